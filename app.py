@@ -5,7 +5,11 @@ AI Research Analyst Agent - Main Streamlit Application
 import streamlit as st
 import asyncio
 import logging
-from datetime import datetime
+import re
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, Any
 
@@ -13,15 +17,35 @@ from typing import Optional, Dict, Any
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sidebar status markers, keyed by RunStatus value
+STATUS_ICON = {
+    'completed': '🟢',
+    'running': '🟡',
+    'failed': '🔴',
+    'pending': '⚪'
+}
+
+# Technical insight markers, keyed by signal name
+SIGNAL_ICON = {
+    "Bullish": "🟢",
+    "Bearish": "🔴",
+    "Overbought": "🟠",
+    "Oversold": "🟡",
+    "High": "🔴",
+    "Low": "🟡",
+    "Normal": "🟢",
+    "Neutral": "⚪"
+}
+
+# Memo text taken from each source
+MEMO_EXCERPT_CHARS = 1000
+_LEADING_WS = re.compile(r"\s*")
+
 # Import our modules
-from core.config import get_config, UI
-from core.ai_analyzer import ai_analyzer
-from core.pdf_generator import pdf_generator
-from core.technical_analysis import technical_analyzer
+from core.config import get_config, UI, PERFORMANCE
 from core.watchlist import watchlist_manager
 from models.database import DatabaseManager
-from models.schemas import RunStatus, RiskItem, OpportunityItem, MetricItem
-from ingestors import SECIngestor, NewsIngestor, MarketIngestor
+from models.schemas import RunStatus, enum_value
 
 # Page configuration
 st.set_page_config(
@@ -34,38 +58,171 @@ st.set_page_config(
 # Initialize session state
 if 'current_analysis' not in st.session_state:
     st.session_state.current_analysis = None
-if 'database' not in st.session_state:
-    st.session_state.database = None
-if 'ingestors' not in st.session_state:
-    st.session_state.ingestors = None
 
-def initialize_components():
-    """Initialize database and ingestors."""
+@st.cache_resource
+def _components() -> Dict[str, Any]:
+    """Create the database and ingestors once, shared across all sessions."""
     try:
-        if st.session_state.database is None:
-            st.session_state.database = DatabaseManager()
-            logger.info("Database initialized")
+        # Imported here so the ingestor dependencies load after the first paint
+        from ingestors import SECIngestor, NewsIngestor, MarketIngestor
         
-        if st.session_state.ingestors is None:
-            st.session_state.ingestors = {
+        components = {
+            'db': DatabaseManager(),
+            'ingestors': {
                 'sec': SECIngestor(),
                 'news': NewsIngestor(),
                 'market': MarketIngestor()
             }
-            logger.info("Ingestors initialized")
-            
+        }
+        logger.info("Database and ingestors initialized")
+        return components
     except Exception as e:
-        st.error(f"Failed to initialize components: {e}")
         logger.error(f"Initialization error: {e}")
+        raise
+
+def get_db() -> DatabaseManager:
+    """Get the shared database manager."""
+    return _components()['db']
+
+def get_ingestors() -> Dict[str, Any]:
+    """Get the shared data ingestors."""
+    return _components()['ingestors']
+
+def _fmt_dt(dt: datetime) -> str:
+    """Format a timestamp as YYYY-MM-DD HH:MM without going through strftime."""
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}"
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _recent_runs(limit: int, version: int):
+    """Get recent run summaries, cached until the next database write."""
+    return get_db().get_recent_run_summaries(limit=limit)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _db_stats(version: int) -> Dict[str, Any]:
+    """Get database stats, cached until the next database write."""
+    return get_db().get_database_stats()
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _cached_memo(run_id: int):
+    """Get a completed run's memo, raising on a miss so it isn't cached."""
+    memo = get_db().get_memo(run_id)
+    if memo is None:
+        raise LookupError(f"No memo for run {run_id}")
+    return memo
+
+def _get_memo(run_id: int):
+    """Get a completed run's memo, or None if it is missing or failed to load."""
+    try:
+        return _cached_memo(run_id)
+    except LookupError:
+        return None
+
+@st.cache_data(ttl=600, max_entries=8, show_spinner=False)
+def _cached_sources(run_id: int):
+    """Get a completed run's sources (with raw content), raising on a miss so it isn't cached."""
+    sources = get_db().get_sources(run_id)
+    if not sources:
+        raise LookupError(f"No sources for run {run_id}")
+    return sources
+
+def _get_sources(run_id: int):
+    """Get a completed run's sources, or an empty list if none could be loaded."""
+    try:
+        return _cached_sources(run_id)
+    except LookupError:
+        return []
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def _tech_chart(ticker: str, period: str) -> Optional[Dict[str, Any]]:
+    """Get the full technical analysis chart, cached for 5 minutes."""
+    from core.technical_analysis import technical_analyzer
+    return technical_analyzer.generate_comprehensive_chart(ticker, period)
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def _simple_chart(ticker: str, period: str) -> Optional[str]:
+    """Get the simple price chart, cached for 5 minutes."""
+    from core.technical_analysis import technical_analyzer
+    return technical_analyzer.create_simple_price_chart(ticker, period)
+
+@st.cache_data(ttl=600, max_entries=16, show_spinner=False)
+def _pdf_report(run_id: int) -> bytes:
+    """Render a completed run's PDF report, reused by repeat exports for 10 minutes."""
+    # The report stack is only loaded on export
+    from core.pdf_generator import pdf_generator
+    
+    memo = _cached_memo(run_id)  # Raises if missing, so nothing is cached
+    run = get_db().get_run(run_id)
+    pdf_bytes = pdf_generator.generate_pdf_report(
+        memo_data=dict(memo),  # Shallow: items stay models, read field-by-field
+        ticker=run.query.upper(),
+        sources=_get_sources(run_id),
+        run_id=run_id
+    )
+    if not pdf_bytes:
+        # Raise rather than return None so a failed render is not cached
+        raise RuntimeError("PDF generation failed. Please check logs.")
+    return pdf_bytes
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _watchlist_maintenance() -> int:
+    """Drop old acknowledged alerts and refresh planner stats, at most once a day."""
+    pruned = watchlist_manager.prune_old_alerts()
+    watchlist_manager.optimize()
+    return pruned
+
+@st.cache_resource
+def get_ai_analyzer():
+    """Load the AI models once, on first use, and share them across sessions."""
+    from core.ai_analyzer import AIAnalyzer
+    return AIAnalyzer()
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    """Get the worker pool that runs analyses off the script thread."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="analysis")
+
+@st.cache_resource
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Get a long-lived event loop running on its own daemon thread."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="ingest-loop", daemon=True).start()
+    return loop
+
+def run_async(coro, loop: Optional[asyncio.AbstractEventLoop] = None,
+              timeout: Optional[float] = PERFORMANCE["max_analysis_time"]):
+    """Run a coroutine on the shared event loop and wait for its result."""
+    future = asyncio.run_coroutine_threadsafe(coro, loop or get_loop())
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        # Don't leave a stuck fetch running on the shared loop
+        future.cancel()
+        raise
+
+@st.cache_resource
+def _yf():
+    """Import yfinance on first use rather than at app startup."""
+    import yfinance
+    return yfinance
+
+QUICK_STATS_FIELDS = ('longName', 'sector', 'marketCap')
+
+@st.cache_data(ttl=300, max_entries=128, show_spinner=False)
+def _ticker_info(ticker: str) -> Dict[str, Any]:
+    """Get the Yahoo Finance fields shown in Quick Stats, cached for 5 minutes."""
+    info = _yf().Ticker(ticker).info or {}
+    return {key: info[key] for key in QUICK_STATS_FIELDS if key in info}
+
+@st.cache_data(ttl=300, max_entries=128, show_spinner=False)
+def _ticker_history(ticker: str, period: str = "1mo"):
+    """Get closing price history, cached for 5 minutes."""
+    return _yf().Ticker(ticker).history(period=period)[['Close']]
 
 def main():
     """Main application function."""
     st.title("🤖 AI Research Analyst Agent")
     st.markdown("Generate comprehensive company analysis reports from public data sources")
     
-    # Initialize components
-    initialize_components()
-    
     # Create main tabs
     tab1, tab2, tab3 = st.tabs(["📊 Single Analysis", "⚖️ Compare Companies", "👁️ Watchlist"])
     
@@ -97,50 +254,44 @@ def single_company_analysis():
         priority = st.selectbox("Priority", ["balanced", "speed", "quality"], 
                                help="Analysis priority setting")
         
+        # One cached query covers both Recent Analyses and Quick Access
+        runs = _recent_runs(20, get_db().version)
+        
         # Recent analyses
         st.subheader("Recent Analyses")
-        if st.session_state.database:
-            recent_runs = st.session_state.database.get_recent_runs(limit=10)
-            for run in recent_runs:
-                status_color = {
-                    'completed': '🟢',
-                    'running': '🟡', 
-                    'failed': '🔴',
-                    'pending': '⚪'
-                }.get(run.status, '⚪')
+        for run in runs[:10]:
+            status_color = STATUS_ICON.get(run.status, '⚪')
                 
-                # Make completed analyses clickable
-                if run.status == 'completed':
-                    if st.button(f"{status_color} {run.query} ({run.status})", key=f"view_{run.id}"):
-                        st.session_state.current_analysis = run.id
-                        st.rerun()
-                else:
-                    st.write(f"{status_color} {run.query} ({run.status})")
+            # Make completed analyses clickable
+            if run.status == 'completed':
+                if st.button(f"{status_color} {run.query} ({run.status})", key=f"view_{run.id}"):
+                    st.session_state.current_analysis = run.id
+                    st.rerun()
+            else:
+                st.write(f"{status_color} {run.query} ({run.status})")
                 
-                st.caption(f"Started: {run.started_at.strftime('%Y-%m-%d %H:%M')}")
-                st.caption(f"ID: {run.id}")
+            st.caption(f"Started: {_fmt_dt(run.started_at)}")
+            st.caption(f"ID: {run.id}")
         
         # Database stats
         st.subheader("Database Stats")
-        if st.session_state.database:
-            stats = st.session_state.database.get_database_stats()
-            if stats:
-                st.write(f"📁 Total Runs: {stats.get('runs_count', 0)}")
-                st.write(f"📰 Total Sources: {stats.get('sources_count', 0)}")
-                st.write(f"📊 Total Memos: {stats.get('memos_count', 0)}")
-                st.write(f"💾 Size: {stats.get('database_size_mb', 0):.1f} MB")
+        stats = _db_stats(get_db().version)
+        if stats:
+            st.write(f"📁 Total Runs: {stats.get('runs_count', 0)}")
+            st.write(f"📰 Total Sources: {stats.get('sources_count', 0)}")
+            st.write(f"📊 Total Memos: {stats.get('memos_count', 0)}")
+            st.write(f"💾 Size: {stats.get('database_size_mb', 0):.1f} MB")
         
         # Quick access to completed analyses
         st.subheader("📋 Quick Access")
-        if st.session_state.database:
-            completed_runs = [run for run in st.session_state.database.get_recent_runs(limit=20) if run.status == 'completed']
-            if completed_runs:
-                for run in completed_runs[:5]:  # Show top 5
-                    if st.button(f"📄 {run.query} - {run.started_at.strftime('%m/%d')}", key=f"quick_{run.id}"):
-                        st.session_state.current_analysis = run.id
-                        st.rerun()
-            else:
-                st.info("No completed analyses yet")
+        completed_runs = [run for run in runs if run.status == 'completed']
+        if completed_runs:
+            for run in completed_runs[:5]:  # Show top 5
+                if st.button(f"📄 {run.query} - {run.started_at.month:02d}/{run.started_at.day:02d}", key=f"quick_{run.id}"):
+                    st.session_state.current_analysis = run.id
+                    st.rerun()
+        else:
+            st.info("No completed analyses yet")
     
     # Main content area
     col1, col2 = st.columns([2, 1])
@@ -171,71 +322,10 @@ def single_company_analysis():
         # Current analysis status
         if st.session_state.current_analysis:
             st.subheader("📋 Current Analysis")
-            run = st.session_state.database.get_run(st.session_state.current_analysis)
+            run = get_db().get_run(st.session_state.current_analysis)
             
             if run:
-                # Progress bar
-                if run.status == 'running':
-                    progress = st.progress(0)
-                    st.write("🔄 Analysis in progress... Please wait.")
-                    
-                    # Check if we should run the actual analysis
-                    if 'analysis_started' not in st.session_state:
-                        st.session_state.analysis_started = True
-                        # Run analysis synchronously (Streamlit doesn't support async)
-                        run_sync_analysis(run.id, run.query)
-                        # Force refresh after analysis completes
-                        st.rerun()
-                    
-                    # Show progress
-                    progress.progress(50)
-                    st.info("📊 Fetching data from multiple sources...")
-                    st.info("🤖 Processing with AI models...")
-                    st.info("📄 Generating analysis report...")
-                    
-                    # Add auto-refresh and manual check
-                    st.info("⏱️ Analysis is running... This should complete in 10-30 seconds.")
-                    if st.button("🔄 Refresh Status", key=f"refresh_{run.id}"):
-                        st.rerun()
-                    
-                    # Auto-refresh every 5 seconds
-                    import time
-                    if 'last_refresh' not in st.session_state:
-                        st.session_state.last_refresh = time.time()
-                    
-                    if time.time() - st.session_state.last_refresh > 5:
-                        st.session_state.last_refresh = time.time()
-                        st.rerun()
-                
-                elif run.status == 'completed':
-                    st.success("✅ Analysis completed!")
-                    
-                    # Show completion details
-                    col_a, col_b = st.columns(2)
-                    with col_a:
-                        st.write(f"**Query:** {run.query}")
-                        st.write(f"**Status:** {run.status}")
-                    with col_b:
-                        st.write(f"**Started:** {run.started_at.strftime('%Y-%m-%d %H:%M:%S')}")
-                        if run.finished_at:
-                            duration = run.finished_at - run.started_at
-                            st.write(f"**Duration:** {duration.total_seconds():.1f} seconds")
-                    
-                    # Display results with better visibility
-                    st.markdown("---")
-                    display_results(run.id)
-                    
-                elif run.status == 'failed':
-                    st.error(f"❌ Analysis failed: {run.error_message}")
-                    st.write(f"**Query:** {run.query}")
-                    st.write(f"**Status:** {run.status}")
-                    st.write(f"**Started:** {run.started_at.strftime('%Y-%m-%d %H:%M:%S')}")
-                
-                # Show status for all runs
-                if run.status == 'pending':
-                    st.info(f"⏳ Analysis pending for {run.query}")
-                elif run.status == 'running':
-                    st.warning(f"🔄 Analysis running for {run.query}")
+                RUN_RENDERERS.get(run.status, render_run_header)(run)
     
     with col2:
         st.header("📈 Quick Stats")
@@ -245,18 +335,15 @@ def single_company_analysis():
             
             # Market data preview
             try:
-                import yfinance as yf
-                ticker_info = yf.Ticker(ticker)
-                
                 # Basic info
-                info = ticker_info.info
+                info = _ticker_info(ticker)
                 if info:
                     st.write(f"**Company:** {info.get('longName', 'N/A')}")
                     st.write(f"**Sector:** {info.get('sector', 'N/A')}")
                     st.write(f"**Market Cap:** ${info.get('marketCap', 0):,.0f}")
                     
                     # Price chart
-                    hist = ticker_info.history(period="1mo")
+                    hist = _ticker_history(ticker, "1mo")
                     if not hist.empty:
                         st.line_chart(hist['Close'])
                         
@@ -279,20 +366,83 @@ def single_company_analysis():
         - **Market Data**: Stock prices & ratios
         """)
 
+def render_run_header(run):
+    """Show the query and status lines shared by every run state."""
+    st.write(f"**Query:** {run.query}")
+    st.write(f"**Status:** {run.status}")
+
+def render_pending_run(run):
+    """Show a run that has not started yet."""
+    st.info(f"⏳ Analysis pending for {run.query}")
+
+def render_running_run(run):
+    """Show a running analysis."""
+    running_status(run.id)
+
+def render_completed_run(run):
+    """Show completion details followed by the results."""
+    st.success("✅ Analysis completed!")
+    
+    # Show completion details
+    col_a, col_b = st.columns(2)
+    with col_a:
+        render_run_header(run)
+    with col_b:
+        st.write(f"**Started:** {run.started_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        if run.finished_at:
+            duration = run.finished_at - run.started_at
+            st.write(f"**Duration:** {duration.total_seconds():.1f} seconds")
+    
+    # Display results with better visibility
+    st.markdown("---")
+    display_results(run.id)
+
+def render_failed_run(run):
+    """Show why a run failed."""
+    st.error(f"❌ Analysis failed: {run.error_message}")
+    render_run_header(run)
+    st.write(f"**Started:** {run.started_at.strftime('%Y-%m-%d %H:%M:%S')}")
+
+# Current Analysis panel renderer for each run status
+RUN_RENDERERS = {
+    'pending': render_pending_run,
+    'running': render_running_run,
+    'completed': render_completed_run,
+    'failed': render_failed_run
+}
+
+@st.fragment(run_every=2)
+def running_status(run_id: int):
+    """Poll a running analysis without rerunning the whole page."""
+    run = get_db().get_run(run_id)
+    if not run or run.status != 'running':
+        # Finished: rerun the full app to render results and refresh the sidebar
+        st.rerun()
+    
+    elapsed = (datetime.now() - run.started_at).total_seconds()
+    st.info(f"🔄 Fetching data, running AI models and building the report... "
+            f"({elapsed:.0f}s elapsed, usually 10-30 seconds)")
+    
+    if st.button("🔄 Refresh Status", key=f"refresh_{run_id}"):
+        st.rerun(scope="fragment")
+
 def start_analysis(query: str, include_sec: bool, include_news: bool, 
                   include_market: bool, max_sources: int, priority: str):
     """Start a new analysis."""
     try:
         # Create analysis run
-        run_id = st.session_state.database.create_run(query)
+        run_id = get_db().create_run(query)
         st.session_state.current_analysis = run_id
         
-        # Reset analysis state
-        if 'analysis_started' in st.session_state:
-            del st.session_state.analysis_started
-        
         # Update status to running
-        st.session_state.database.update_run_status(run_id, RunStatus.RUNNING)
+        get_db().update_run_status(run_id, RunStatus.RUNNING)
+        
+        # Run the pipeline in the background; the UI only polls the run status
+        with st.spinner("Loading AI models..."):
+            analyzer = get_ai_analyzer()
+        future = get_executor().submit(run_sync_analysis, run_id, query, get_db(), get_ingestors(),
+                                       get_loop(), analyzer, include_sec, include_news, include_market)
+        future.add_done_callback(_log_worker_error)
         
         st.success(f"Analysis started for {query}! Run ID: {run_id}")
         st.rerun()
@@ -301,131 +451,133 @@ def start_analysis(query: str, include_sec: bool, include_news: bool,
         st.error(f"Failed to start analysis: {e}")
         logger.error(f"Analysis start error: {e}")
 
-def run_sync_analysis(run_id: int, query: str):
-    """Run the complete analysis workflow synchronously."""
+def _log_worker_error(future):
+    """Log errors that escaped a background analysis instead of dropping them."""
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Background analysis crashed: {error}", exc_info=error)
+
+def run_sync_analysis(run_id: int, query: str, database: DatabaseManager,
+                      ingestors: Dict[str, Any], loop: asyncio.AbstractEventLoop,
+                      analyzer, include_sec: bool = True,
+                      include_news: bool = True, include_market: bool = True):
+    """
+    Run the complete analysis workflow synchronously.
+    
+    Runs on a worker thread, so it must not call into Streamlit.
+    """
     try:
         logger.info(f"Starting full analysis for run {run_id}")
         
-        # Get ingestors
-        sec_ingestor = st.session_state.ingestors['sec']
-        news_ingestor = st.session_state.ingestors['news']
-        market_ingestor = st.session_state.ingestors['market']
-        
-        sources = []
-        
-        # 1. Market data
-        try:
-            logger.info("Fetching market data...")
-            # Run market ingestor synchronously
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                market_sources = loop.run_until_complete(market_ingestor.ingest(query, run_id))
-                sources.extend(market_sources)
-                logger.info(f"Fetched {len(market_sources)} market sources")
-            finally:
-                loop.close()
-        except Exception as e:
-            logger.warning(f"Market data failed: {e}")
-        
-        # 2. News data
-        try:
-            logger.info("Fetching news data...")
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                news_sources = loop.run_until_complete(news_ingestor.ingest(query, run_id))
-                sources.extend(news_sources)
-                logger.info(f"Fetched {len(news_sources)} news sources")
-            finally:
-                loop.close()
-        except Exception as e:
-            logger.warning(f"News data failed: {e}")
+        # Get ingestors for the selected data sources
+        selected = []
+        if include_market:
+            selected.append(("market", ingestors['market']))
+        if include_news:
+            selected.append(("news", ingestors['news']))
+        if include_sec:
+            selected.append(("SEC", ingestors['sec']))
+        
+        # Fetch from all sources concurrently on the shared event loop
+        async def fetch_all():
+            return await asyncio.gather(
+                *(ingestor.ingest(query, run_id) for _, ingestor in selected),
+                return_exceptions=True
+            )
         
-        # 3. SEC filings
-        try:
-            logger.info("Fetching SEC filings...")
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                sec_sources = loop.run_until_complete(sec_ingestor.ingest(query, run_id))
-                sources.extend(sec_sources)
-                logger.info(f"Fetched {len(sec_sources)} SEC sources")
-            finally:
-                loop.close()
-        except Exception as e:
-            logger.warning(f"SEC data failed: {e}")
+        logger.info(f"Fetching {', '.join(name for name, _ in selected)} data...")
+        results = run_async(fetch_all(), loop)
         
-        # Save sources to database
-        logger.info("Saving sources...")
-        for source in sources:
-            try:
-                # Handle both enum objects and string values
-                source_type_value = source.type.value if hasattr(source.type, 'value') else source.type
-                
-                source_id = st.session_state.database.add_source(
-                    run_id=run_id,
-                    source_type=source_type_value,
-                    url=source.url,
-                    title=source.title,
-                    published_at=source.published_at,
-                    checksum=source.checksum,
-                    raw_content=source.raw_content,
-                    metadata=source.metadata
-                )
-            except Exception as e:
-                logger.warning(f"Failed to save source: {e}")
+        sources = []
+        for (name, _), result in zip(selected, results):
+            if isinstance(result, Exception):
+                logger.warning(f"{name.capitalize()} data failed: {result}")
+                continue
+            sources.extend(result)
+            logger.info(f"Fetched {len(result)} {name} sources")
         
         # Generate memo (simplified for now)
         logger.info("Generating memo...")
-        memo_data = generate_simple_memo(query, sources)
-        
-        # Save memo - convert Pydantic objects to dictionaries
-        memo_id = st.session_state.database.save_memo(
-            run_id=run_id,
-            tldr=memo_data["tldr"],
-            risks=[risk.model_dump() for risk in memo_data["risks"]],
-            opportunities=[opp.model_dump() for opp in memo_data["opportunities"]],
-            metrics=[metric.model_dump() for metric in memo_data["metrics"]],
-            html_content=memo_data["html_content"]
-        )
-        
-        # Update status to completed
-        st.session_state.database.update_run_status(run_id, RunStatus.COMPLETED)
+        memo_data = generate_simple_memo(query, sources, analyzer)
+        
+        # Save sources, memo and final status in one transaction
+        logger.info("Saving results...")
+        # Any failure rolls the whole save back; the handler below marks the run failed
+        with database.transaction():
+            database.add_sources_bulk(run_id, sources)
+            database.update_run_metadata(run_id, {
+                "sources_by_type": group_sources_by_type(sources)
+            })
+            
+            # Memo items are already plain dictionaries
+            memo_id = database.save_memo(
+                run_id=run_id,
+                tldr=memo_data["tldr"],
+                risks=memo_data["risks"],
+                opportunities=memo_data["opportunities"],
+                metrics=memo_data["metrics"],
+                html_content=memo_data["html_content"]
+            )
+            
+            database.update_run_status(run_id, RunStatus.COMPLETED)
         logger.info(f"Analysis completed for run {run_id}")
         
     except Exception as e:
         logger.error(f"Analysis failed for run {run_id}: {e}")
-        st.session_state.database.update_run_status(run_id, RunStatus.FAILED, str(e))
+        database.update_run_status(run_id, RunStatus.FAILED, str(e))
+
+def group_sources_by_type(sources: list) -> Dict[str, list]:
+    """Build the per-type source listing shown on the results page."""
+    groups = defaultdict(list)
+    for source in sources:
+        groups[enum_value(source.type)].append({
+            "title": source.title,
+            "url": source.url,
+            "published_at": source.published_at.isoformat() if source.published_at else None
+        })
+    return dict(groups)
+
+def _source_excerpt(raw_content: str) -> Optional[str]:
+    """
+    First MEMO_EXCERPT_CHARS of a source's stripped text, or None if too short.
+    
+    Only the head is kept, so leading whitespace is skipped by index rather
+    than copying a possibly multi-MB filing with strip().
+    """
+    start = _LEADING_WS.match(raw_content).end()
+    content = raw_content[start:start + MEMO_EXCERPT_CHARS + 100].rstrip()
+    if len(content) > MEMO_EXCERPT_CHARS:  # Limit content length
+        content = content[:MEMO_EXCERPT_CHARS] + "..."
+    if len(content) > 50:  # Only include substantial content
+        return content
+    return None
 
-def generate_simple_memo(ticker: str, sources: list):
+def generate_simple_memo(ticker: str, sources: list, analyzer):
     """Generate an AI-powered memo based on available sources."""
     
-    # Count sources by type
-    source_counts = {}
+    # Count sources by type and collect text for AI analysis in one pass
+    source_total = len(sources)
+    source_counts = Counter()
     text_chunks = []
+    append_chunk = text_chunks.append
     
     for source in sources:
-        source_type = source.type.value if hasattr(source.type, 'value') else source.type
-        source_counts[source_type] = source_counts.get(source_type, 0) + 1
-        
-        # Collect text content for AI analysis
-        if source.raw_content:
-            # Clean and truncate content
-            content = source.raw_content.strip()
-            if len(content) > 1000:  # Limit content length
-                content = content[:1000] + "..."
-            if len(content) > 50:  # Only include substantial content
-                text_chunks.append(content)
+        source_counts[enum_value(source.type)] += 1
+        
+        raw_content = source.raw_content
+        if raw_content:
+            content = _source_excerpt(raw_content)
+            if content:
+                append_chunk(content)
     
     # Generate AI-powered insights
     try:
         logger.info(f"Generating AI insights from {len(text_chunks)} text chunks")
         
         # Extract AI insights
-        ai_risks = ai_analyzer.extract_risks(text_chunks, ticker)
-        ai_opportunities = ai_analyzer.extract_opportunities(text_chunks, ticker)
-        ai_summary = ai_analyzer.generate_summary(text_chunks, max_length=200)
+        ai_risks = analyzer.extract_risks(text_chunks, ticker)
+        ai_opportunities = analyzer.extract_opportunities(text_chunks, ticker)
+        ai_summary = analyzer.generate_summary(text_chunks, max_length=200)
         
         logger.info(f"AI analysis generated {len(ai_risks)} risks and {len(ai_opportunities)} opportunities")
         
@@ -433,50 +585,66 @@ def generate_simple_memo(ticker: str, sources: list):
         logger.error(f"AI analysis failed: {e}")
         ai_risks = []
         ai_opportunities = []
-        ai_summary = f"{ticker} analysis completed with {len(sources)} data sources."
+        ai_summary = f"{ticker} analysis completed with {source_total} data sources."
+    
+    # Memo items are stored as plain dicts; convert AI results once here
+    ai_risks = [risk.model_dump() for risk in ai_risks]
+    ai_opportunities = [opp.model_dump() for opp in ai_opportunities]
     
     # Fallback to basic analysis if AI fails
     if not ai_risks:
         ai_risks = [
-            RiskItem(
-                risk="Market volatility",
-                rationale="General market risks apply to all equity investments",
-                source_ids=["S1"]
-            ),
-            RiskItem(
-                risk="Competitive pressures",
-                rationale="Industry competition may impact market share",
-                source_ids=["S2"]
-            ),
-            RiskItem(
-                risk="Regulatory environment",
-                rationale="Changes in regulations could affect operations",
-                source_ids=["S3"]
-            )
+            {
+                "risk": "Market volatility",
+                "rationale": "General market risks apply to all equity investments",
+                "source_ids": [],
+                "confidence": 0.5,
+                "severity": "medium"
+            },
+            {
+                "risk": "Competitive pressures",
+                "rationale": "Industry competition may impact market share",
+                "source_ids": [],
+                "confidence": 0.5,
+                "severity": "medium"
+            },
+            {
+                "risk": "Regulatory environment",
+                "rationale": "Changes in regulations could affect operations",
+                "source_ids": [],
+                "confidence": 0.5,
+                "severity": "medium"
+            }
         ]
     
     if not ai_opportunities:
         ai_opportunities = [
-            OpportunityItem(
-                opportunity="Market expansion",
-                rationale="Potential for growth in new markets or segments",
-                source_ids=["S1"]
-            ),
-            OpportunityItem(
-                opportunity="Innovation potential",
-                rationale="Technology and product development opportunities",
-                source_ids=["S2"]
-            ),
-            OpportunityItem(
-                opportunity="Strategic partnerships",
-                rationale="Potential for beneficial business relationships",
-                source_ids=["S3"]
-            )
+            {
+                "opportunity": "Market expansion",
+                "rationale": "Potential for growth in new markets or segments",
+                "source_ids": [],
+                "confidence": 0.5,
+                "potential_impact": "medium"
+            },
+            {
+                "opportunity": "Innovation potential",
+                "rationale": "Technology and product development opportunities",
+                "source_ids": [],
+                "confidence": 0.5,
+                "potential_impact": "medium"
+            },
+            {
+                "opportunity": "Strategic partnerships",
+                "rationale": "Potential for beneficial business relationships",
+                "source_ids": [],
+                "confidence": 0.5,
+                "potential_impact": "medium"
+            }
         ]
     
     # Use AI summary or fallback
     if not ai_summary or len(ai_summary) < 50:
-        ai_summary = f"{ticker} analysis completed with {len(sources)} data sources covering market data, news, and regulatory filings. Analysis identifies key business risks and growth opportunities."
+        ai_summary = f"{ticker} analysis completed with {source_total} data sources covering market data, news, and regulatory filings. Analysis identifies key business risks and growth opportunities."
     
     # Create enhanced memo with AI insights
     memo_data = {
@@ -484,41 +652,43 @@ def generate_simple_memo(ticker: str, sources: list):
         "risks": ai_risks[:3],  # Top 3 risks
         "opportunities": ai_opportunities[:3],  # Top 3 opportunities
         "metrics": [
-            MetricItem(
-                metric="Data Sources",
-                value=str(len(sources)),
-                trend="stable",
-                period="Current",
-                source_ids=["S1"],
-                context=f"Total sources analyzed: {len(sources)}"
-            ),
-            MetricItem(
-                metric="Source Types",
-                value=str(len(source_counts)),
-                trend="up", 
-                period="Current",
-                source_ids=["S2"],
-                context=f"Data diversity: {', '.join(source_counts.keys())}"
-            ),
-            MetricItem(
-                metric="AI Insights",
-                value=str(len(ai_risks) + len(ai_opportunities)),
-                trend="up",
-                period="Current", 
-                source_ids=["S3"],
-                context=f"AI-generated insights: {len(ai_risks)} risks, {len(ai_opportunities)} opportunities"
-            )
+            {
+                "metric": "Data Sources",
+                "value": str(source_total),
+                "trend": "stable",
+                "period": "Current",
+                "source_ids": [],
+                "context": f"Total sources analyzed: {source_total}"
+            },
+            {
+                "metric": "Source Types",
+                "value": str(len(source_counts)),
+                "trend": "up",
+                "period": "Current",
+                "source_ids": [],
+                "context": f"Data diversity: {', '.join(source_counts.keys())}"
+            },
+            {
+                "metric": "AI Insights",
+                "value": str(len(ai_risks) + len(ai_opportunities)),
+                "trend": "up",
+                "period": "Current",
+                "source_ids": [],
+                "context": f"AI-generated insights: {len(ai_risks)} risks, {len(ai_opportunities)} opportunities"
+            }
         ],
-        "html_content": f"<h1>{ticker} AI Analysis Report</h1><p>{ai_summary}</p><p><strong>Sources analyzed:</strong> {len(sources)}</p>"
+        "html_content": f"<h1>{ticker} AI Analysis Report</h1><p>{ai_summary}</p><p><strong>Sources analyzed:</strong> {source_total}</p>"
     }
     
     return memo_data
 
+@st.fragment
 def display_results(run_id: int):
     """Display analysis results."""
     try:
         # Get memo
-        memo = st.session_state.database.get_memo(run_id)
+        run = get_db().get_run(run_id)
+        memo = _get_memo(run_id)
         if not memo:
             st.info("No memo found for this analysis")
             return
@@ -554,7 +724,7 @@ def display_results(run_id: int):
         
         # Sources (show automatically)
         st.subheader("📚 Data Sources")
-        display_sources(run_id)
+        display_sources(run_id, run)
         
         # Export options
         st.subheader("📤 Export Options")
@@ -564,34 +734,21 @@ def display_results(run_id: int):
             if st.button("📄 Export PDF", use_container_width=True):
                 try:
                     with st.spinner("Generating PDF report..."):
-                        # Get memo and sources for PDF generation
-                        sources = st.session_state.database.get_sources(run_id)
-                        run = st.session_state.database.get_run(run_id)
-                        
-                        # Generate PDF
-                        pdf_bytes = pdf_generator.generate_pdf_report(
-                            memo_data=memo.model_dump() if hasattr(memo, 'model_dump') else memo.__dict__,
-                            ticker=run.query.upper(),
-                            sources=sources,
-                            run_id=run_id
-                        )
-                        
-                        if pdf_bytes:
-                            # Create download button
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            filename = f"{run.query.upper()}_analysis_{timestamp}.pdf"
-                            
-                            st.download_button(
-                                label="⬇️ Download PDF Report",
-                                data=pdf_bytes,
-                                file_name=filename,
-                                mime="application/pdf",
-                                use_container_width=True
-                            )
-                            st.success("PDF report generated successfully!")
-                        else:
-                            st.error("PDF generation failed. Please check logs.")
-                            
+                        pdf_bytes = _pdf_report(run_id)
+                    
+                    # Create download button
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    filename = f"{run.query.upper()}_analysis_{timestamp}.pdf"
+                    
+                    st.download_button(
+                        label="⬇️ Download PDF Report",
+                        data=pdf_bytes,
+                        file_name=filename,
+                        mime="application/pdf",
+                        use_container_width=True
+                    )
+                    st.success("PDF report generated successfully!")
+                    
                 except Exception as e:
                     st.error(f"PDF export failed: {e}")
                     logger.error(f"PDF export error: {e}")
@@ -638,7 +795,7 @@ def display_technical_analysis(run):
             with st.spinner(f"Generating technical analysis for {ticker}..."):
                 if show_full_analysis:
                     # Generate comprehensive technical analysis
-                    tech_results = technical_analyzer.generate_comprehensive_chart(ticker, period)
+                    tech_results = _tech_chart(ticker, period)
                     
                     if tech_results:
                         # Display chart
@@ -654,16 +811,7 @@ def display_technical_analysis(run):
                         insights = tech_results.get("insights", [])
                         if insights:
                             for insight in insights:
-                                signal_color = {
-                                    "Bullish": "🟢",
-                                    "Bearish": "🔴", 
-                                    "Overbought": "🟠",
-                                    "Oversold": "🟡",
-                                    "High": "🔴",
-                                    "Low": "🟡",
-                                    "Normal": "🟢",
-                                    "Neutral": "⚪"
-                                }.get(insight["signal"], "⚪")
+                                signal_color = SIGNAL_ICON.get(insight["signal"], "⚪")
                                 
                                 st.write(f"{signal_color} **{insight['type']}**: {insight['signal']}")
                                 st.caption(insight["description"])
@@ -679,7 +827,7 @@ def display_technical_analysis(run):
                         
                 else:
                     # Generate simple price chart
-                    simple_chart = technical_analyzer.create_simple_price_chart(ticker, period)
+                    simple_chart = _simple_chart(ticker, period)
                     
                     if simple_chart:
                         st.components.v1.html(simple_chart, height=450, scrolling=True)
@@ -690,30 +838,25 @@ def display_technical_analysis(run):
         st.error(f"Technical analysis failed: {e}")
         logger.error(f"Technical analysis error: {e}")
 
-def display_sources(run_id: int):
+def display_sources(run_id: int, run=None):
     """Display data sources used in the analysis."""
     try:
-        sources = st.session_state.database.get_sources(run_id)
+        # Grouped listing saved with the run; older runs are grouped on the fly
+        source_types = run.metadata.get("sources_by_type") if run else None
+        if source_types is None:
+            source_types = group_sources_by_type(_get_sources(run_id))
         
         st.subheader("📚 Data Sources")
         
-        # Group by type
-        source_types = {}
-        for source in sources:
-            source_type = source.type
-            if source_type not in source_types:
-                source_types[source_type] = []
-            source_types[source_type].append(source)
-        
         # Display each type
         for source_type, type_sources in source_types.items():
             with st.expander(f"{source_type.replace('_', ' ').title()} ({len(type_sources)})"):
                 for source in type_sources:
-                    st.write(f"**{source.title or 'Untitled'}**")
-                    if source.url:
-                        st.write(f"URL: {source.url}")
-                    if source.published_at:
-                        st.write(f"Date: {source.published_at.strftime('%Y-%m-%d')}")
+                    st.write(f"**{source['title'] or 'Untitled'}**")
+                    if source['url']:
+                        st.write(f"URL: {source['url']}")
+                    if source['published_at']:
+                        st.write(f"Date: {source['published_at'][:10]}")
                     st.write("---")
         
     except Exception as e:
@@ -766,9 +909,19 @@ def run_comparison_analysis(ticker_a: str, ticker_b: str, include_metrics: bool,
     
     with st.spinner(f"Analyzing {ticker_a} vs {ticker_b}..."):
         try:
-            # Get or create analyses for both companies
-            results_a = get_or_create_analysis(ticker_a)
-            results_b = get_or_create_analysis(ticker_b)
+            # Get or create analyses for both companies concurrently
+            shared = (get_db(), get_ingestors(), get_ai_analyzer(), get_loop())
+            future_a = get_executor().submit(get_or_create_analysis, ticker_a, *shared)
+            future_b = get_executor().submit(get_or_create_analysis, ticker_b, *shared)
+            # One deadline for the pair, so a stuck job can't hang the script thread
+            _, pending = wait((future_a, future_b), timeout=PERFORMANCE["max_analysis_time"])
+            if pending:
+                for future in pending:
+                    future.cancel()
+                st.error(f"Comparison timed out after {PERFORMANCE['max_analysis_time']}s")
+                logger.error(f"Comparison of {ticker_a} vs {ticker_b} timed out")
+                return
+            results_a, results_b = future_a.result(), future_b.result()
             
             if results_a and results_b:
                 # Store comparison results
@@ -793,69 +946,83 @@ def run_comparison_analysis(ticker_a: str, ticker_b: str, include_metrics: bool,
             st.error(f"Comparison failed: {e}")
             logger.error(f"Comparison error: {e}")
 
-def get_or_create_analysis(ticker: str) -> Optional[Dict]:
-    """Get existing analysis or create new one for a ticker."""
+def get_or_create_analysis(ticker: str, database: DatabaseManager, ingestors: Dict[str, Any],
+                           analyzer, loop: asyncio.AbstractEventLoop) -> Optional[Dict]:
+    """
+    Get existing analysis or create new one for a ticker.
+    
+    Runs on a worker thread, so it must not call into Streamlit.
+    """
     try:
         # Check for recent completed analysis
-        if st.session_state.database:
-            recent_runs = st.session_state.database.get_recent_runs(limit=10)
-            for run in recent_runs:
-                if run.query.upper() == ticker.upper() and run.status == 'completed':
-                    # Get memo and sources
-                    memo = st.session_state.database.get_memo(run.id)
-                    sources = st.session_state.database.get_sources(run.id)
-                    
-                    if memo:
-                        return {
-                            'run_id': run.id,
-                            'memo': memo,
-                            'sources': sources,
-                            'timestamp': run.finished_at
-                        }
+        run = database.get_latest_completed_run(ticker)
+        if run:
+            # Get memo and sources
+            memo = database.get_memo(run.id)
+            sources = database.get_sources(run.id)
+                
+            if memo:
+                return {
+                    'run_id': run.id,
+                    'memo': memo,
+                    'sources': sources,
+                    'timestamp': run.finished_at
+                }
         
         # If no recent analysis, run a quick one
-        st.info(f"Running fresh analysis for {ticker}...")
-        return run_quick_analysis(ticker)
+        logger.info(f"Running fresh analysis for {ticker}...")
+        return run_quick_analysis(ticker, database, ingestors, analyzer, loop)
         
     except Exception as e:
         logger.error(f"Failed to get/create analysis for {ticker}: {e}")
         return None
 
-def run_quick_analysis(ticker: str) -> Optional[Dict]:
+def run_quick_analysis(ticker: str, database: DatabaseManager, ingestors: Dict[str, Any],
+                       analyzer, loop: asyncio.AbstractEventLoop) -> Optional[Dict]:
     """Run a quick analysis for comparison purposes."""
     try:
         # Create new analysis run
-        run_id = st.session_state.database.create_run(ticker)
+        run_id = database.create_run(ticker)
         
         # Quick data collection (market data only for speed)
-        market_ingestor = MarketIngestor()
+        market_ingestor = ingestors['market']
         sources = []
         
         # Get market data
         try:
-            market_sources = run_sync_analysis(
-                market_ingestor.ingest(ticker, run_id)
-            )
+            market_sources = run_async(market_ingestor.ingest(ticker, run_id), loop)
             sources.extend(market_sources)
         except Exception as e:
             logger.warning(f"Market data failed for {ticker}: {e}")
         
         # Generate quick memo
-        memo_data = generate_simple_memo(ticker, sources)
-        memo_id = st.session_state.database.save_memo(
-            run_id, 
-            memo_data["tldr"],
-            [item.model_dump() for item in memo_data["risks"]],
-            [item.model_dump() for item in memo_data["opportunities"]], 
-            [item.model_dump() for item in memo_data["metrics"]],
-            memo_data["html_content"]
-        )
-        
-        # Update run status
-        st.session_state.database.update_run_status(run_id, RunStatus.COMPLETED)
+        memo_data = generate_simple_memo(ticker, sources, analyzer)
         
-        # Get memo object
-        memo = st.session_state.database.get_memo(run_id)
+        # Save sources, memo and final status in one transaction; any failure
+        # rolls all of it back
+        try:
+            with database.transaction():
+                database.add_sources_bulk(run_id, sources)
+                database.update_run_metadata(run_id, {
+                    "sources_by_type": group_sources_by_type(sources)
+                })
+                
+                memo_id = database.save_memo(
+                    run_id, 
+                    memo_data["tldr"],
+                    memo_data["risks"],
+                    memo_data["opportunities"], 
+                    memo_data["metrics"],
+                    memo_data["html_content"]
+                )
+                database.update_run_status(run_id, RunStatus.COMPLETED)
+                
+                # Get memo object (same connection, so it sees the uncommitted row)
+                memo = database.get_memo(run_id)
+        except Exception as e:
+            logger.error(f"Failed to save analysis for {ticker}: {e}")
+            database.update_run_status(run_id, RunStatus.FAILED, str(e))
+            return None
         
         return {
             'run_id': run_id,
@@ -937,6 +1104,7 @@ def watchlist_interface():
     """Watchlist management interface."""
     st.header("👁️ Stock Watchlist")
     st.markdown("Monitor multiple stocks and get automated analysis updates")
+    _watchlist_maintenance()
     
     # Watchlist selection/creation
     col1, col2 = st.columns([2, 1])
@@ -1092,59 +1260,64 @@ def watchlist_interface():
                     run_bulk_watchlist_analysis(selected_watchlist)
             
             with col2:
-                stale_items = watchlist_manager.get_stale_items(hours=24)
-                stale_count = len([item for item in stale_items 
-                                 if item['watchlist_id'] == selected_watchlist['id']])
+                stale_count = watchlist_manager.count_stale_items(
+                    hours=24, watchlist_id=selected_watchlist['id'])
                 
                 if st.button(f"🔄 Update Stale ({stale_count})", use_container_width=True):
                     st.info("Stale update feature coming soon!")
 
-def run_watchlist_analysis(ticker: str, watchlist_id: int):
-    """Run analysis for a single stock in watchlist."""
+def run_watchlist_analysis(ticker: str, watchlist_id: int, update_watchlist: bool = True) -> bool:
+    """
+    Run analysis for a single stock in watchlist.
+    
+    With update_watchlist=False the caller is responsible for stamping
+    last_analyzed_at (bulk analysis does it once for all tickers).
+    """
     with st.spinner(f"Analyzing {ticker}..."):
         try:
             # Check for existing recent analysis
-            if st.session_state.database:
-                recent_runs = st.session_state.database.get_recent_runs(limit=5)
-                for run in recent_runs:
-                    if (run.query.upper() == ticker.upper() and 
-                        run.status == 'completed' and
-                        (datetime.now() - run.finished_at).hours < 4):  # Less than 4 hours old
-                        
-                        st.success(f"✅ Using recent analysis for {ticker}")
-                        watchlist_manager.update_last_analyzed(watchlist_id, ticker)
-                        st.session_state.current_analysis = run.id
-                        return
+            run = get_db().get_latest_completed_run(ticker)
+            if (run and run.finished_at and
+                datetime.now() - run.finished_at < timedelta(hours=4)):  # Less than 4 hours old
+                    
+                st.success(f"✅ Using recent analysis for {ticker}")
+                if update_watchlist:
+                    watchlist_manager.update_last_analyzed(watchlist_id, ticker)
+                st.session_state.current_analysis = run.id
+                return True
             
             # Run new analysis
-            run_id = st.session_state.database.create_run(ticker)
+            run_id = get_db().create_run(ticker)
             st.session_state.current_analysis = run_id
             
             # Quick analysis using market data
-            market_ingestor = MarketIngestor()
-            sources = run_sync_analysis(market_ingestor.ingest(ticker, run_id))
+            market_ingestor = get_ingestors()['market']
+            sources = run_async(market_ingestor.ingest(ticker, run_id))
             
             # Generate memo
-            memo_data = generate_simple_memo(ticker, sources)
-            st.session_state.database.save_memo(
+            memo_data = generate_simple_memo(ticker, sources, get_ai_analyzer())
+            get_db().save_memo(
                 run_id,
                 memo_data["tldr"],
-                [item.model_dump() for item in memo_data["risks"]],
-                [item.model_dump() for item in memo_data["opportunities"]],
-                [item.model_dump() for item in memo_data["metrics"]],
+                memo_data["risks"],
+                memo_data["opportunities"],
+                memo_data["metrics"],
                 memo_data["html_content"]
             )
             
             # Update status and watchlist
-            st.session_state.database.update_run_status(run_id, RunStatus.COMPLETED)
-            watchlist_manager.update_last_analyzed(watchlist_id, ticker)
+            get_db().update_run_status(run_id, RunStatus.COMPLETED)
+            if update_watchlist:
+                watchlist_manager.update_last_analyzed(watchlist_id, ticker)
             
             st.success(f"✅ Analysis completed for {ticker}")
             st.info("Switch to 'Single Analysis' tab to view detailed results")
+            return True
             
         except Exception as e:
             st.error(f"Analysis failed for {ticker}: {e}")
             logger.error(f"Watchlist analysis error: {e}")
+            return False
 
 def run_bulk_watchlist_analysis(watchlist: Dict[str, Any]):
     """Run analysis for all stocks in a watchlist."""
@@ -1156,17 +1329,21 @@ def run_bulk_watchlist_analysis(watchlist: Dict[str, Any]):
     
     progress_bar = st.progress(0)
     status_text = st.empty()
+    analyzed = []
     
     for i, item in enumerate(items):
         status_text.text(f"Analyzing {item['ticker']} ({i+1}/{len(items)})...")
         progress_bar.progress((i) / len(items))
         
         try:
-            run_watchlist_analysis(item['ticker'], watchlist["id"])
+            if run_watchlist_analysis(item['ticker'], watchlist["id"], update_watchlist=False):
+                analyzed.append(item['ticker'])
         except Exception as e:
             st.warning(f"Failed to analyze {item['ticker']}: {e}")
             continue
     
+    # Stamp every analyzed ticker in one transaction
+    watchlist_manager.update_last_analyzed_bulk(watchlist["id"], analyzed)
     progress_bar.progress(1.0)
     status_text.text("✅ Bulk analysis completed!")
     st.success(f"Analyzed {len(items)} stocks in '{watchlist['name']}'")
@@ -6,35 +6,167 @@ Uses Hugging Face transformers for intelligent risk/opportunity extraction.
 
 import os
 import re
+import time
+import pickle
+import hashlib
+import threading
+from functools import wraps
+from importlib.util import find_spec
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import logging
 
-# AI/NLP imports
-try:
-    from transformers import pipeline, Pipeline
-    import torch
-    from sentence_transformers import SentenceTransformer
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
+import numpy as np
+
+# AI/NLP dependencies are only checked here; they are imported when the models load
+TRANSFORMERS_AVAILABLE = all(
+    find_spec(name) is not None
+    for name in ("transformers", "torch", "sentence_transformers")
+)
+if not TRANSFORMERS_AVAILABLE:
     logging.warning("Transformers not available - AI features will be limited")
 
+# Optional ONNX Runtime backend for the sentence embedder (sentence-transformers>=3.2)
+ONNX_AVAILABLE = all(find_spec(name) is not None for name in ("optimum", "onnxruntime"))
+
+# Tokenizers spawn their own thread pool per call; with batched inference on top
+# of torch's intra-op threads that oversubscribes the CPU
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
 # Data models
 from models.schemas import RiskItem, OpportunityItem, MetricItem
+from core.config import CACHE_DIR, PROCESSING
 
 logger = logging.getLogger(__name__)
 
+AI_CACHE_DIR = CACHE_DIR / "ai"
+
+# Risk and opportunity cues, each combined into one case-insensitive alternation
+# so a sentence is matched in a single regex pass
+RISK_PATTERNS = (
+    r'risk(?:s)?.*?(?:include|are|of|to|from)',
+    r'challenge(?:s)?.*?(?:include|facing|with|in)',
+    r'threat(?:s)?.*?(?:to|from|of|posed)',
+    r'concern(?:s)?.*?(?:about|regarding|over|raised)',
+    r'uncertainty.*?(?:in|about|regarding|surrounding)',
+    r'volatility.*?(?:in|of|due to|caused by)',
+    r'decline.*?(?:in|of|due to|resulted from)',
+    r'competition.*?(?:from|in|increasing|intense)',
+    r'regulatory.*?(?:risk|concern|change|pressure)',
+    r'market.*?(?:downturn|pressure|risk|decline)',
+    r'cyber.*?(?:risk|security|threat|attack)',
+    r'supply.*?(?:chain|shortage|disruption)',
+    r'inflation.*?(?:pressure|impact|risk)',
+    r'recession.*?(?:risk|concern|impact)'
+)
+OPPORTUNITY_PATTERNS = (
+    r'opportunit(?:y|ies).*?(?:to|in|for|include)',
+    r'growth.*?(?:in|opportunity|potential|expected)',
+    r'expansion.*?(?:into|of|in|plans)',
+    r'investment(?:s)?.*?(?:in|to|for|opportunity)',
+    r'new.*?(?:market(?:s)?|product(?:s)?|service(?:s)?)',
+    r'innovation(?:s)?.*?(?:in|to|for)',
+    r'partnership(?:s)?.*?(?:with|to|for)',
+    r'acquisition(?:s)?.*?(?:of|to|for)'
+)
+_RISK_RE = re.compile("|".join(f"(?:{p})" for p in RISK_PATTERNS), re.IGNORECASE)
+_OPPORTUNITY_RE = re.compile("|".join(f"(?:{p})" for p in OPPORTUNITY_PATTERNS), re.IGNORECASE)
+EMBEDDING_CACHE_SIZE = 10000  # sentences
+CLASSIFICATION_CACHE_SIZE = 4096  # sentences
+SUMMARY_WINDOW_TOKENS = 1000  # distilbart accepts 1024 tokens, less special tokens
+MAX_SUMMARY_WINDOWS = 8
+# Generous chars-per-token bound; text past this would fall outside the windows anyway
+MAX_SUMMARY_CHARS = SUMMARY_WINDOW_TOKENS * MAX_SUMMARY_WINDOWS * 8
+_SENTENCE_END = str.maketrans('!?', '..')  # Split on '.' after folding '!' and '?' into it
+_LEADING_STOPWORD_RE = re.compile(r'^(the|a|an|in|on|at|to|for|of|with|by)\s+')
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", min(4, os.cpu_count() or 1)))
+
+
+def _join_normalized(chunks: List[str], max_chars: int) -> str:
+    """Join chunks with runs of whitespace collapsed, stopping once max_chars is reached."""
+    parts = []
+    total = 0
+    for chunk in chunks:
+        text = " ".join(chunk.split())
+        if text:
+            parts.append(text)
+            total += len(text) + 1
+            if total >= max_chars:
+                break
+    return " ".join(parts)[:max_chars]
+
+
+class _ModelFallback(Exception):
+    """Raised by a cached method when the model failed and a fallback was used."""
+    
+    def __init__(self, result: Any):
+        super().__init__("model call failed; using fallback result")
+        self.result = result
+
+
+def _disk_cached(model_attr: str):
+    """
+    Cache a text-analysis method's result on disk, keyed by its inputs.
+    
+    Results are only cached when the model named by ``model_attr`` is loaded
+    and the call didn't fall back (signalled by raising ``_ModelFallback``), so
+    rule-based fallbacks never shadow real model output.
+    """
+    caching = PROCESSING["caching"]
+    ttl_seconds = caching["ttl_hours"] * 3600
+    
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, text_chunks: List[str], *args, **kwargs):
+            if not caching["enable"] or getattr(self, model_attr) is None:
+                try:
+                    return fn(self, text_chunks, *args, **kwargs)
+                except _ModelFallback as fallback:
+                    return fallback.result
+            
+            digest = hashlib.sha1(fn.__name__.encode())
+            digest.update(repr((args, sorted(kwargs.items()))).encode())
+            for chunk in text_chunks:
+                digest.update(b"\0" + chunk.encode())
+            path = AI_CACHE_DIR / f"{digest.hexdigest()}.pkl"
+            
+            try:
+                if time.time() - path.stat().st_mtime < ttl_seconds:
+                    return pickle.loads(path.read_bytes())
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.debug(f"Ignoring unreadable AI cache entry {path.name}: {e}")
+            
+            try:
+                result = fn(self, text_chunks, *args, **kwargs)
+            except _ModelFallback as fallback:
+                return fallback.result  # Transient failure: serve it, don't cache it
+            try:
+                AI_CACHE_DIR.mkdir(exist_ok=True)
+                tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(pickle.dumps(result))
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.debug(f"Failed to write AI cache entry: {e}")
+            return result
+        return wrapper
+    return decorator
+
 
 class AIAnalyzer:
     """AI-powered financial text analyzer using Hugging Face models."""
     
     def __init__(self):
         """Initialize AI models and pipelines."""
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = "cpu"
         self.summarizer = None
         self.classifier = None
         self.embedder = None
+        self._embedding_cache: Dict[str, np.ndarray] = {}
+        self._embedding_lock = threading.Lock()  # analyses run on several executor workers
+        self._classification_cache: Dict[str, Dict[str, Any]] = {}
+        self._classification_lock = threading.Lock()
         self._load_models()
     
     def _load_models(self):
@@ -44,12 +176,20 @@ class AIAnalyzer:
             return
             
         try:
+            from transformers import pipeline
+            import torch
+            from sentence_transformers import SentenceTransformer
+            
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+            if self.device == "cpu":
+                self._configure_cpu_threads(torch)
+            
             # Summarization model (lightweight)
             logger.info("Loading summarization model...")
-            self.summarizer = pipeline(
+            self.summarizer = self._build_pipeline(
+                pipeline, torch,
                 "summarization",
                 model="sshleifer/distilbart-cnn-6-6",  # Lightweight model
-                device=0 if self.device == "cuda" else -1,
                 max_length=150,
                 min_length=50,
                 do_sample=False
@@ -57,22 +197,81 @@ class AIAnalyzer:
             
             # Text classification for sentiment/risk detection
             logger.info("Loading classification model...")
-            self.classifier = pipeline(
+            self.classifier = self._build_pipeline(
+                pipeline, torch,
                 "text-classification",
-                model="nlptown/bert-base-multilingual-uncased-sentiment",
-                device=0 if self.device == "cuda" else -1
+                model="nlptown/bert-base-multilingual-uncased-sentiment"
             )
             
             # Sentence embeddings for similarity
             logger.info("Loading embedding model...")
-            self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+            self.embedder = self._load_embedder(SentenceTransformer, 'all-MiniLM-L6-v2')
             
+            if self.device == "cpu":
+                self._quantize_for_cpu(torch)
+            
+            self._warmup()
             logger.info(f"AI models loaded successfully on {self.device}")
             
         except Exception as e:
             logger.error(f"Failed to load AI models: {e}")
             logger.info("Falling back to rule-based analysis")
     
+    def _configure_cpu_threads(self, torch):
+        """Cap torch's thread pools so concurrent sessions don't oversubscribe the CPU."""
+        torch.set_num_threads(TORCH_NUM_THREADS)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError as e:
+            # Only settable before the first parallel op in the process
+            logger.debug(f"Could not set torch inter-op threads: {e}")
+    
+    def _warmup(self):
+        """Run one tiny forward pass per model so the first request doesn't pay for it."""
+        try:
+            self.classifier("warmup")
+            self.summarizer("warmup " * 40, max_length=20, min_length=5)
+            self.embedder.encode(["warmup"])
+        except Exception as e:
+            logger.warning(f"Model warmup failed: {e}")
+    
+    def _build_pipeline(self, pipeline, torch, task: str, **kwargs):
+        """Create a pipeline on the selected device, in fp16 when running on CUDA."""
+        if self.device == "cuda":
+            try:
+                return pipeline(task, device=0, torch_dtype=torch.float16, **kwargs)
+            except Exception as e:
+                logger.warning(f"fp16 {task} pipeline failed, using fp32: {e}")
+            return pipeline(task, device=0, **kwargs)
+        return pipeline(task, device=-1, **kwargs)
+    
+    def _load_embedder(self, SentenceTransformer, model_name: str):
+        """Load the embedder on ONNX Runtime when available on CPU, else on torch."""
+        if self.device == "cpu" and ONNX_AVAILABLE:
+            try:
+                return SentenceTransformer(
+                    model_name,
+                    backend="onnx",
+                    model_kwargs={"provider": "CPUExecutionProvider"}
+                )
+            except Exception as e:
+                logger.warning(f"ONNX embedder unavailable, using torch: {e}")
+        return SentenceTransformer(model_name)
+    
+    def _quantize_for_cpu(self, torch):
+        """Swap the pipelines' Linear layers for dynamic int8 versions on CPU."""
+        for name in ("summarizer", "classifier"):
+            pipe = getattr(self, name)
+            try:
+                pipe.model = torch.quantization.quantize_dynamic(
+                    pipe.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                logger.info(f"Quantized {name} to int8")
+            except Exception as e:
+                # Keep the fp32 model; quantization is only an optimization
+                logger.warning(f"Could not quantize {name}, using fp32: {e}")
+    
+    @_disk_cached("classifier")
     def extract_risks(self, text_chunks: List[str], company_name: str = "") -> List[RiskItem]:
         """
         Extract business risks from text using AI analysis.
@@ -89,77 +288,63 @@ class AIAnalyzer:
         
         risks = []
         
-        # Enhanced risk patterns with financial context
-        risk_patterns = [
-            r'risk(?:s)?.*?(?:include|are|of|to|from)',
-            r'challenge(?:s)?.*?(?:include|facing|with|in)',
-            r'threat(?:s)?.*?(?:to|from|of|posed)',
-            r'concern(?:s)?.*?(?:about|regarding|over|raised)',
-            r'uncertainty.*?(?:in|about|regarding|surrounding)',
-            r'volatility.*?(?:in|of|due to|caused by)',
-            r'decline.*?(?:in|of|due to|resulted from)',
-            r'competition.*?(?:from|in|increasing|intense)',
-            r'regulatory.*?(?:risk|concern|change|pressure)',
-            r'market.*?(?:downturn|pressure|risk|decline)',
-            r'cyber.*?(?:risk|security|threat|attack)',
-            r'supply.*?(?:chain|shortage|disruption)',
-            r'inflation.*?(?:pressure|impact|risk)',
-            r'recession.*?(?:risk|concern|impact)'
-        ]
-        
-        # Enhanced sentiment scoring
-        sentiment_scores = []
-        
+        # Collect risk-pattern sentences from all chunks, then classify them in one batch
+        candidates = []
+        seen = set()  # Boilerplate repeats across filings; classify each sentence once
         for i, chunk in enumerate(text_chunks):
-            if len(chunk) < 100:  # Skip very short chunks
+            # Skip very short chunks, and chunks with no risk cue anywhere: a
+            # sentence can only match if the chunk containing it does
+            if len(chunk) < 100 or not _RISK_RE.search(chunk):
                 continue
                 
             try:
                 # Find risk-related sentences
-                sentences = re.split(r'[.!?]+', chunk)
+                sentences = chunk.translate(_SENTENCE_END).split('.')
                 for sentence in sentences:
                     sentence = sentence.strip()
                     if len(sentence) < 50:
                         continue
                     
                     # Check if sentence contains risk patterns
-                    has_risk_pattern = any(re.search(pattern, sentence.lower()) 
-                                         for pattern in risk_patterns)
-                    
-                    if has_risk_pattern:
-                        # Analyze sentiment (negative = risk)
-                        try:
-                            sentiment = self.classifier(sentence[:512])  # Truncate for BERT
-                            if sentiment and len(sentiment) > 0:
-                                score = sentiment[0]['score']
-                                label = sentiment[0]['label']
-                                
-                                # Consider negative sentiment or low scores as risks
-                                if (label in ['NEGATIVE', '1 star', '2 stars'] or 
-                                    (label == 'NEUTRAL' and score < 0.6)):
-                                    
-                                    # Extract key risk phrase
-                                    risk_text = self._extract_key_phrase(sentence)
-                                    if risk_text and len(risks) < 5:  # Limit to top 5 risks
-                                        risks.append(RiskItem(
-                                            risk=risk_text,
-                                            rationale=sentence.strip(),
-                                            source_ids=[f"S{i+1}"]
-                                        ))
-                        except Exception as e:
-                            logger.debug(f"Sentiment analysis failed: {e}")
-                            continue
+                    if sentence not in seen and _RISK_RE.search(sentence):
+                        seen.add(sentence)
+                        candidates.append((i, sentence))
                             
             except Exception as e:
                 logger.warning(f"Risk extraction failed for chunk {i}: {e}")
                 continue
         
+        # Analyze sentiment (negative = risk)
+        sentiments = self._classify(candidates)
+        if sentiments is None:
+            raise _ModelFallback(self._extract_risks_fallback(text_chunks, company_name))
+        for (i, sentence), sentiment in zip(candidates, sentiments):
+            score = sentiment['score']
+            label = sentiment['label']
+            
+            # Consider negative sentiment or low scores as risks
+            if (label in ['NEGATIVE', '1 star', '2 stars'] or 
+                (label == 'NEUTRAL' and score < 0.6)):
+                
+                # Extract key risk phrase
+                risk_text = self._extract_key_phrase(sentence)
+                if risk_text:
+                    risks.append(RiskItem(
+                        risk=risk_text,
+                        rationale=sentence,
+                        confidence=score,
+                        severity="high" if label in ['NEGATIVE', '1 star'] else "medium"
+                    ))
+                    if len(risks) >= 5:  # Limit to top 5 risks
+                        break
+        
         # If no AI-detected risks, fall back to pattern matching
         if not risks:
             risks = self._extract_risks_fallback(text_chunks, company_name)
         
         return risks[:3]  # Return top 3 risks
     
+    @_disk_cached("classifier")
     def extract_opportunities(self, text_chunks: List[str], company_name: str = "") -> List[OpportunityItem]:
         """
         Extract business opportunities from text using AI analysis.
@@ -175,63 +360,121 @@ class AIAnalyzer:
             return self._extract_opportunities_fallback(text_chunks, company_name)
         
         opportunities = []
-        opportunity_patterns = [
-            r'opportunit(?:y|ies).*?(?:to|in|for|include)',
-            r'growth.*?(?:in|opportunity|potential|expected)',
-            r'expansion.*?(?:into|of|in|plans)',
-            r'investment(?:s)?.*?(?:in|to|for|opportunity)',
-            r'new.*?(?:market(?:s)?|product(?:s)?|service(?:s)?)',
-            r'innovation(?:s)?.*?(?:in|to|for)',
-            r'partnership(?:s)?.*?(?:with|to|for)',
-            r'acquisition(?:s)?.*?(?:of|to|for)'
-        ]
         
+        # Collect opportunity-pattern sentences from all chunks, then classify them in one batch
+        candidates = []
+        seen = set()  # Boilerplate repeats across filings; classify each sentence once
         for i, chunk in enumerate(text_chunks):
-            if len(chunk) < 100:
+            if len(chunk) < 100 or not _OPPORTUNITY_RE.search(chunk):
                 continue
                 
             try:
-                sentences = re.split(r'[.!?]+', chunk)
+                sentences = chunk.translate(_SENTENCE_END).split('.')
                 for sentence in sentences:
                     sentence = sentence.strip()
                     if len(sentence) < 50:
                         continue
                     
                     # Check for opportunity patterns
-                    has_opportunity_pattern = any(re.search(pattern, sentence.lower()) 
-                                                for pattern in opportunity_patterns)
-                    
-                    if has_opportunity_pattern:
-                        try:
-                            sentiment = self.classifier(sentence[:512])
-                            if sentiment and len(sentiment) > 0:
-                                score = sentiment[0]['score']
-                                label = sentiment[0]['label']
-                                
-                                # Consider positive sentiment as opportunities
-                                if (label in ['POSITIVE', '4 stars', '5 stars'] or 
-                                    (label == 'NEUTRAL' and score > 0.7)):
-                                    
-                                    opportunity_text = self._extract_key_phrase(sentence)
-                                    if opportunity_text and len(opportunities) < 5:
-                                        opportunities.append(OpportunityItem(
-                                            opportunity=opportunity_text,
-                                            rationale=sentence.strip(),
-                                            source_ids=[f"S{i+1}"]
-                                        ))
-                        except Exception as e:
-                            logger.debug(f"Sentiment analysis failed: {e}")
-                            continue
+                    if sentence not in seen and _OPPORTUNITY_RE.search(sentence):
+                        seen.add(sentence)
+                        candidates.append((i, sentence))
                             
             except Exception as e:
                 logger.warning(f"Opportunity extraction failed for chunk {i}: {e}")
                 continue
         
+        sentiments = self._classify(candidates)
+        if sentiments is None:
+            raise _ModelFallback(self._extract_opportunities_fallback(text_chunks, company_name))
+        for (i, sentence), sentiment in zip(candidates, sentiments):
+            score = sentiment['score']
+            label = sentiment['label']
+            
+            # Consider positive sentiment as opportunities
+            if (label in ['POSITIVE', '4 stars', '5 stars'] or 
+                (label == 'NEUTRAL' and score > 0.7)):
+                
+                opportunity_text = self._extract_key_phrase(sentence)
+                if opportunity_text:
+                    opportunities.append(OpportunityItem(
+                        opportunity=opportunity_text,
+                        rationale=sentence,
+                        confidence=score,
+                        potential_impact="high" if label in ['POSITIVE', '5 stars'] else "medium"
+                    ))
+                    if len(opportunities) >= 5:
+                        break
+        
         if not opportunities:
             opportunities = self._extract_opportunities_fallback(text_chunks, company_name)
         
         return opportunities[:3]  # Return top 3 opportunities
     
+    def embed(self, sentences: List[str]) -> Optional[np.ndarray]:
+        """
+        Embed sentences in batches, reusing vectors already computed.
+        
+        Args:
+            sentences: Sentences to embed
+            
+        Returns:
+            Array of normalized embeddings (one row per sentence), or None if
+            the embedding model is unavailable
+        """
+        if self.embedder is None or not sentences:
+            return None
+        
+        # Read hits up front so a later eviction can't drop vectors we still need
+        with self._embedding_lock:
+            found = {s: self._embedding_cache[s] for s in sentences if s in self._embedding_cache}
+        missing = list(dict.fromkeys(s for s in sentences if s not in found))
+        if missing:
+            vectors = self.embedder.encode(
+                missing,
+                batch_size=64,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            found.update(zip(missing, vectors))
+            with self._embedding_lock:
+                if len(self._embedding_cache) + len(missing) > EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.clear()
+                self._embedding_cache.update(zip(missing, vectors))
+        
+        return np.stack([found[s] for s in sentences])
+    
+    def _classify(self, candidates: List[Tuple[int, str]]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run the sentiment classifier over all candidate sentences in batches.
+        
+        Sentences already scored (e.g. by the other extractor on the same
+        filing) are served from an in-memory cache instead of re-running BERT.
+        Returns None if the classifier failed.
+        """
+        if not candidates:
+            return []
+        
+        texts = [sentence[:512] for _, sentence in candidates]  # Truncate for BERT
+        with self._classification_lock:
+            found = {t: self._classification_cache[t] for t in texts if t in self._classification_cache}
+        missing = list(dict.fromkeys(t for t in texts if t not in found))
+        if missing:
+            try:
+                results = self.classifier(missing, batch_size=32, truncation=True)
+            except Exception as e:
+                logger.warning(f"Sentiment analysis failed: {e}")
+                return None
+            found.update(zip(missing, results))
+            with self._classification_lock:
+                if len(self._classification_cache) + len(missing) > CLASSIFICATION_CACHE_SIZE:
+                    self._classification_cache.clear()
+                self._classification_cache.update(zip(missing, results))
+        
+        return [found[t] for t in texts]
+    
+    @_disk_cached("summarizer")
     def generate_summary(self, text_chunks: List[str], max_length: int = 200) -> str:
         """
         Generate an executive summary using AI summarization.
@@ -248,37 +491,53 @@ class AIAnalyzer:
         
         try:
             # Combine and clean text
-            combined_text = " ".join(text_chunks)
-            combined_text = re.sub(r'\s+', ' ', combined_text).strip()
-            
-            # Limit input length for model
-            if len(combined_text) > 2000:
-                combined_text = combined_text[:2000]
+            combined_text = _join_normalized(text_chunks, MAX_SUMMARY_CHARS)
             
             if len(combined_text) < 100:
                 return self._generate_summary_fallback(text_chunks)
             
-            # Generate summary
-            summary = self.summarizer(
-                combined_text, 
-                max_length=min(max_length, 150), 
-                min_length=50,
+            # Split into model-sized token windows and summarize them in one batch
+            tokenizer = self.summarizer.tokenizer
+            token_ids = tokenizer(combined_text, add_special_tokens=False)["input_ids"]
+            windows = [
+                tokenizer.decode(token_ids[start:start + SUMMARY_WINDOW_TOKENS])
+                for start in range(0, len(token_ids), SUMMARY_WINDOW_TOKENS)
+            ][:MAX_SUMMARY_WINDOWS]
+            
+            # Keep min_length <= max_length for short summaries, or generation errors out
+            summary_max = min(max_length, 150)
+            partials = self.summarizer(
+                windows,
+                batch_size=4,
+                max_length=summary_max,
+                min_length=min(40, summary_max),
+                truncation=True,
                 do_sample=False
             )
             
-            if summary and len(summary) > 0:
-                return summary[0]['summary_text']
+            # Reduce: summarize the partial summaries when there was more than one window
+            if len(partials) > 1:
+                partials = self.summarizer(
+                    " ".join(p['summary_text'] for p in partials),
+                    max_length=summary_max,
+                    min_length=min(50, summary_max),
+                    truncation=True,
+                    do_sample=False
+                )
+            
+            if partials:
+                return partials[0]['summary_text']
             else:
                 return self._generate_summary_fallback(text_chunks)
                 
         except Exception as e:
             logger.warning(f"AI summarization failed: {e}")
-            return self._generate_summary_fallback(text_chunks)
+            raise _ModelFallback(self._generate_summary_fallback(text_chunks))
     
     def _extract_key_phrase(self, sentence: str) -> str:
         """Extract the key phrase from a sentence."""
         # Remove common stop words and extract meaningful phrase
-        sentence = re.sub(r'^(the|a|an|in|on|at|to|for|of|with|by)\s+', '', sentence.lower())
+        sentence = _LEADING_STOPWORD_RE.sub('', sentence.lower())
         sentence = sentence.strip().capitalize()
         
         # Limit length
@@ -299,7 +558,8 @@ class AIAnalyzer:
             risks.append(RiskItem(
                 risk=f"{keyword.title()} challenges",
                 rationale=f"Industry-wide {keyword} concerns may impact performance",
-                source_ids=["S1"]
+                confidence=0.5,
+                severity="medium"
             ))
         
         return risks
@@ -315,7 +575,8 @@ class AIAnalyzer:
             opportunities.append(OpportunityItem(
                 opportunity=f"{keyword.title()} potential",
                 rationale=f"Potential for growth through {keyword}",
-                source_ids=["S1"]
+                confidence=0.5,
+                potential_impact="medium"
             ))
         
         return opportunities
@@ -328,7 +589,3 @@ class AIAnalyzer:
         return (f"Analysis of available data sources including financial filings, "
                 f"news articles, and market data. Summary generated from "
                 f"{len(text_chunks)} source(s).")
-
-
-# Global instance
-ai_analyzer = AIAnalyzer()
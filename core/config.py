@@ -4,7 +4,8 @@ Configuration settings for the AI Research Analyst Agent.
 
 import os
 from pathlib import Path
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Any, Mapping
 
 # Project paths
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -150,34 +151,54 @@ SECURITY = {
     "max_requests_per_minute": 60
 }
 
-def get_config() -> Dict[str, Any]:
-    """Get the complete configuration dictionary."""
-    return {
-        "ai_models": AI_MODELS,
-        "data_sources": DATA_SOURCES,
-        "processing": PROCESSING,
-        "export": EXPORT,
-        "ui": UI,
-        "logging": LOGGING,
-        "performance": PERFORMANCE,
-        "security": SECURITY,
-        "paths": {
-            "project_root": str(PROJECT_ROOT),
-            "data_dir": str(DATA_DIR),
-            "templates_dir": str(TEMPLATES_DIR),
-            "cache_dir": str(CACHE_DIR),
-            "database": str(DATABASE_PATH)
-        }
+def _freeze(value: Any) -> Any:
+    """Recursively wrap dicts in read-only mapping proxies."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+# Settings are read-only at runtime; freeze them once at import
+AI_MODELS = _freeze(AI_MODELS)
+DATA_SOURCES = _freeze(DATA_SOURCES)
+PROCESSING = _freeze(PROCESSING)
+EXPORT = _freeze(EXPORT)
+UI = _freeze(UI)
+LOGGING = _freeze(LOGGING)
+PERFORMANCE = _freeze(PERFORMANCE)
+SECURITY = _freeze(SECURITY)
+
+_CONFIG = _freeze({
+    "ai_models": AI_MODELS,
+    "data_sources": DATA_SOURCES,
+    "processing": PROCESSING,
+    "export": EXPORT,
+    "ui": UI,
+    "logging": LOGGING,
+    "performance": PERFORMANCE,
+    "security": SECURITY,
+    "paths": {
+        "project_root": str(PROJECT_ROOT),
+        "data_dir": str(DATA_DIR),
+        "templates_dir": str(TEMPLATES_DIR),
+        "cache_dir": str(CACHE_DIR),
+        "database": str(DATABASE_PATH)
     }
+})
 
-def get_model_config(model_type: str) -> Dict[str, Any]:
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+def get_config() -> Mapping[str, Any]:
+    """Get the complete (read-only) configuration mapping."""
+    return _CONFIG
+
+def get_model_config(model_type: str) -> Mapping[str, Any]:
     """Get configuration for a specific AI model type."""
-    return AI_MODELS.get(model_type, {})
+    return AI_MODELS.get(model_type, _EMPTY)
 
-def get_data_source_config(source_type: str) -> Dict[str, Any]:
+def get_data_source_config(source_type: str) -> Mapping[str, Any]:
     """Get configuration for a specific data source type."""
-    return DATA_SOURCES.get(source_type, {})
+    return DATA_SOURCES.get(source_type, _EMPTY)
 
-def get_export_config(format_type: str) -> Dict[str, Any]:
+def get_export_config(format_type: str) -> Mapping[str, Any]:
     """Get configuration for a specific export format."""
-    return EXPORT.get(format_type, {})
+    return EXPORT.get(format_type, _EMPTY)
@@ -6,29 +6,291 @@ Generates professional PDF reports from analysis data.
 
 import os
 import io
+import re
+import base64
+import binascii
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import unquote_to_bytes
 import logging
 
 # PDF generation imports
 try:
     import weasyprint
+    from weasyprint.text.fonts import FontConfiguration
     from jinja2 import Environment, FileSystemLoader
-    import matplotlib.pyplot as plt
-    import plotly.graph_objects as go
-    import plotly.io as pio
+    # Figure renders through the Agg canvas without pyplot's global state,
+    # so charts can be drawn from any Streamlit thread
+    from matplotlib.figure import Figure
     PDF_AVAILABLE = True
 except ImportError:
     PDF_AVAILABLE = False
     logging.warning("PDF generation dependencies not available")
 
+from core.config import PERFORMANCE, get_export_config
+from models.schemas import enum_value
+
 logger = logging.getLogger(__name__)
 
+# Set PDF_BACKEND=chromium to render with headless Chromium (needs playwright)
+PDF_BACKEND = os.getenv("PDF_BACKEND", "weasyprint").lower()
+CHROMIUM_AVAILABLE = find_spec("playwright") is not None
+
+# Report stylesheet, split so rules for sections a report doesn't render are
+# left out of the document WeasyPrint has to parse
+_BASE_CSS = """
+body {
+    font-family: Arial, sans-serif;
+    margin: 40px;
+    line-height: 1.6;
+    color: #333;
+}
+.header {
+    text-align: center;
+    border-bottom: 3px solid #007acc;
+    padding-bottom: 20px;
+    margin-bottom: 30px;
+}
+.company-name {
+    font-size: 28px;
+    font-weight: bold;
+    color: #007acc;
+    margin-bottom: 5px;
+}
+.report-title {
+    font-size: 18px;
+    color: #666;
+    margin-bottom: 10px;
+}
+.metadata {
+    font-size: 12px;
+    color: #888;
+}
+.section {
+    margin-bottom: 25px;
+    page-break-inside: avoid;
+}
+.section-title {
+    font-size: 18px;
+    font-weight: bold;
+    color: #007acc;
+    border-bottom: 1px solid #ddd;
+    padding-bottom: 5px;
+    margin-bottom: 15px;
+}
+.summary-box {
+    background: #f8f9fa;
+    border-left: 4px solid #007acc;
+    padding: 15px;
+    margin-bottom: 20px;
+}
+"""
+_ITEM_CSS = """
+.risk-item, .opportunity-item {
+    background: #fff;
+    border: 1px solid #e0e0e0;
+    border-radius: 5px;
+    padding: 12px;
+    margin-bottom: 10px;
+}
+.risk-item {
+    border-left: 4px solid #dc3545;
+}
+.opportunity-item {
+    border-left: 4px solid #28a745;
+}
+.item-title {
+    font-weight: bold;
+    margin-bottom: 5px;
+}
+.item-rationale {
+    color: #666;
+    font-size: 14px;
+}
+"""
+_METRIC_CSS = """
+.metrics-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+    gap: 15px;
+    margin-top: 15px;
+}
+.metric-card {
+    background: #f8f9fa;
+    border: 1px solid #e0e0e0;
+    border-radius: 5px;
+    padding: 15px;
+    text-align: center;
+}
+.metric-value {
+    font-size: 24px;
+    font-weight: bold;
+    color: #007acc;
+}
+.metric-label {
+    font-size: 12px;
+    color: #666;
+    margin-top: 5px;
+}
+"""
+_SOURCES_CSS = """
+.sources-table {
+    width: 100%;
+    border-collapse: collapse;
+    margin-top: 15px;
+}
+.sources-table th, .sources-table td {
+    border: 1px solid #ddd;
+    padding: 8px;
+    text-align: left;
+}
+.sources-table th {
+    background-color: #f8f9fa;
+    font-weight: bold;
+}
+.chart-container {
+    text-align: center;
+    margin: 20px 0;
+}
+.chart-image {
+    max-width: 100%;
+    height: auto;
+}
+"""
+
+
+def _minify_css(css: str) -> str:
+    """Drop comments and insignificant whitespace from a stylesheet."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{}:;,])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+# Built-in report template, compiled once per PDFGenerator
+_PDF_TEMPLATE_SRC = (
+    '<!DOCTYPE html><html><head><meta charset="utf-8">'
+    '<title>{{ ticker }} Analysis Report</title><style>'
+    + _minify_css(_BASE_CSS)
+    + '{% if risks or opportunities %}' + _minify_css(_ITEM_CSS) + '{% endif %}'
+    + '{% if metrics %}' + _minify_css(_METRIC_CSS) + '{% endif %}'
+    + '{% if source_chart_data_uri %}' + _minify_css(_SOURCES_CSS) + '{% endif %}'
+    + '</style></head>'
+    + """
+<body>
+    <div class="header">
+        <div class="company-name">{{ ticker }} Analysis Report</div>
+        <div class="report-title">AI-Powered Financial Analysis</div>
+        <div class="metadata">
+            Generated on {{ generated_at }} | Run ID: {{ run_id }}
+        </div>
+    </div>
+
+    <div class="section">
+        <div class="section-title">Executive Summary</div>
+        <div class="summary-box">
+            {{ tldr }}
+        </div>
+    </div>
+
+    <div class="section">
+        <div class="section-title">Key Risks</div>
+        {% for risk in risks %}
+        <div class="risk-item">
+            <div class="item-title">{{ risk.risk }}</div>
+            <div class="item-rationale">{{ risk.rationale }}</div>
+        </div>
+        {% endfor %}
+    </div>
+
+    <div class="section">
+        <div class="section-title">Key Opportunities</div>
+        {% for opportunity in opportunities %}
+        <div class="opportunity-item">
+            <div class="item-title">{{ opportunity.opportunity }}</div>
+            <div class="item-rationale">{{ opportunity.rationale }}</div>
+        </div>
+        {% endfor %}
+    </div>
+
+    <div class="section">
+        <div class="section-title">Key Metrics</div>
+        <div class="metrics-grid">
+            {% for metric in metrics %}
+            <div class="metric-card">
+                <div class="metric-value">{{ metric.value }}</div>
+                <div class="metric-label">{{ metric.metric }}</div>
+            </div>
+            {% endfor %}
+        </div>
+    </div>
+
+    {% if source_chart_data_uri %}
+    <div class="section">
+        <div class="section-title">Data Sources</div>
+        <div class="chart-container">
+            <img src="{{ source_chart_data_uri }}" class="chart-image" alt="Source Distribution">
+        </div>
+        <table class="sources-table">
+            <thead>
+                <tr>
+                    <th>Source Type</th>
+                    <th>Count</th>
+                </tr>
+            </thead>
+            <tbody>
+                {% for source in source_breakdown %}
+                <tr>
+                    <td>{{ source.type }}</td>
+                    <td>{{ source.count }}</td>
+                </tr>
+                {% endfor %}
+            </tbody>
+        </table>
+    </div>
+    {% endif %}
+
+    <div class="section">
+        <div class="section-title">Analysis Details</div>
+        <p><strong>Total Sources Analyzed:</strong> {{ total_sources }}</p>
+        <p><strong>Analysis Method:</strong> AI-powered extraction using natural language processing</p>
+        <p><strong>Report Generated:</strong> {{ generated_at }}</p>
+    </div>
+</body>
+</html>
+"""
+)
+
+def _as_dict(item: Any) -> Dict[str, Any]:
+    """Field values of a flat pydantic item without a model_dump copy; dicts pass through."""
+    return item if isinstance(item, dict) else item.__dict__
+
+
+def _url_fetcher(url: str) -> Dict[str, Any]:
+    """WeasyPrint URL fetcher that decodes inline data: URIs (the charts) directly."""
+    if url.startswith("data:"):
+        header, _, payload = url.partition(",")
+        mime_type = header[5:].split(";")[0] or "text/plain"
+        if header.endswith(";base64"):
+            return {"string": base64.b64decode(payload), "mime_type": mime_type}
+        return {"string": unquote_to_bytes(payload), "mime_type": mime_type}
+    return weasyprint.default_url_fetcher(url)
+
 
 class PDFGenerator:
     """Professional PDF report generator."""
     
+    # Playwright's sync API is bound to the thread that started it, so one
+    # dedicated thread owns the browser and every Chromium render runs there
+    _chromium_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-chromium")
+    _playwright = None
+    _browser = None
+    
     def __init__(self):
         """Initialize PDF generator with templates."""
         self.template_dir = Path("templates")
@@ -41,6 +303,16 @@ class PDFGenerator:
                 trim_blocks=True,
                 lstrip_blocks=True
             )
+            try:
+                self._pdf_template = self.jinja_env.from_string(self._get_pdf_template())
+            except Exception as e:
+                logger.warning(f"Failed to compile PDF template: {e}")
+                self._pdf_template = None
+            
+            # Fonts are resolved once and reused by every render; the font map
+            # isn't thread-safe, so renders sharing it are serialized
+            self._font_config = FontConfiguration()
+            self._render_lock = threading.Lock()
     
     def generate_pdf_report(self, memo_data: Dict[str, Any], ticker: str, 
                           sources: List[Any], run_id: int) -> Optional[bytes]:
@@ -62,64 +334,38 @@ class PDFGenerator:
         
         try:
             # Prepare data for template
-            report_data = self._prepare_report_data(memo_data, ticker, sources, run_id)
+            source_counts = Counter(enum_value(source.type) for source in sources)
+            report_data = self._prepare_report_data(memo_data, ticker, sources, run_id, source_counts)
             
             # Generate charts
-            charts_data = self._generate_charts(sources, ticker)
+            charts_data = self._generate_charts(source_counts, ticker)
             report_data.update(charts_data)
             
             # Render HTML from template
             html_content = self._render_html_template(report_data)
             
-            # Convert HTML to PDF
-            pdf_bytes = self._html_to_pdf(html_content)
-            
-            # Save to file
+            # Convert HTML to PDF, written straight to the export file
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"{ticker}_analysis_{timestamp}.pdf"
             filepath = self.output_dir / filename
-            
-            with open(filepath, 'wb') as f:
-                f.write(pdf_bytes)
+            self._html_to_pdf(html_content, filepath)
             
             logger.info(f"PDF report generated: {filepath}")
-            return pdf_bytes
+            return filepath.read_bytes()
             
         except Exception as e:
             logger.error(f"PDF generation failed: {e}")
             return None
     
     def _prepare_report_data(self, memo_data: Dict[str, Any], ticker: str, 
-                           sources: List[Any], run_id: int) -> Dict[str, Any]:
+                           sources: List[Any], run_id: int,
+                           source_counts: Dict[str, int]) -> Dict[str, Any]:
         """Prepare data for PDF template."""
         
-        # Convert Pydantic objects to dicts if needed
-        risks = []
-        for risk in memo_data.get("risks", []):
-            if hasattr(risk, 'model_dump'):
-                risks.append(risk.model_dump())
-            else:
-                risks.append(risk)
-        
-        opportunities = []
-        for opp in memo_data.get("opportunities", []):
-            if hasattr(opp, 'model_dump'):
-                opportunities.append(opp.model_dump())
-            else:
-                opportunities.append(opp)
-        
-        metrics = []
-        for metric in memo_data.get("metrics", []):
-            if hasattr(metric, 'model_dump'):
-                metrics.append(metric.model_dump())
-            else:
-                metrics.append(metric)
-        
-        # Count sources by type
-        source_counts = {}
-        for source in sources:
-            source_type = source.type.value if hasattr(source.type, 'value') else source.type
-            source_counts[source_type] = source_counts.get(source_type, 0) + 1
+        # Templates only read flat fields, so a model's own field dict will do
+        risks = [_as_dict(risk) for risk in memo_data.get("risks", [])]
+        opportunities = [_as_dict(opp) for opp in memo_data.get("opportunities", [])]
+        metrics = [_as_dict(metric) for metric in memo_data.get("metrics", [])]
         
         return {
             "ticker": ticker.upper(),
@@ -138,38 +384,32 @@ class PDFGenerator:
             ]
         }
     
-    def _generate_charts(self, sources: List[Any], ticker: str) -> Dict[str, str]:
-        """Generate charts for the PDF report."""
+    def _generate_charts(self, source_counts: Dict[str, int], ticker: str) -> Dict[str, str]:
+        """Generate charts for the PDF report from per-type source counts."""
         charts = {}
         
         try:
             # Source distribution pie chart
-            source_counts = {}
-            for source in sources:
-                source_type = source.type.value if hasattr(source.type, 'value') else source.type
-                source_counts[source_type] = source_counts.get(source_type, 0) + 1
-            
             if source_counts:
-                # Create plotly pie chart
-                fig = go.Figure(data=[go.Pie(
+                # Render the donut chart in-process with matplotlib
+                fig = Figure(figsize=(4, 3), dpi=100)
+                ax = fig.add_subplot()
+                ax.pie(
+                    list(source_counts.values()),
                     labels=[k.replace("_", " ").title() for k in source_counts.keys()],
-                    values=list(source_counts.values()),
-                    hole=0.3,
-                    marker_colors=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd']
-                )])
-                
-                fig.update_layout(
-                    title=f"{ticker} Data Sources Distribution",
-                    font_size=12,
-                    width=400,
-                    height=300,
-                    margin=dict(t=40, b=40, l=40, r=40)
+                    colors=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd'],
+                    wedgeprops={"width": 0.7},
+                    textprops={"fontsize": 9}
                 )
+                ax.set_title(f"{ticker} Data Sources Distribution", fontsize=12)
                 
-                # Convert to base64 for embedding
-                img_bytes = pio.to_image(fig, format="png", width=400, height=300)
-                import base64
-                charts["source_chart"] = base64.b64encode(img_bytes).decode()
+                # Embed as a ready-made data URI
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format="png", bbox_inches="tight")
+                img_bytes = buffer.getvalue()
+                charts["source_chart_data_uri"] = (
+                    "data:image/png;base64," + binascii.b2a_base64(img_bytes, newline=False).decode("ascii")
+                )
             
         except Exception as e:
             logger.warning(f"Chart generation failed: {e}")
@@ -179,231 +419,80 @@ class PDFGenerator:
     def _render_html_template(self, data: Dict[str, Any]) -> str:
         """Render HTML template with data."""
         
-        # Use a built-in template if file doesn't exist
-        template_content = self._get_pdf_template()
-        
         try:
-            template = self.jinja_env.from_string(template_content)
-            return template.render(**data)
+            return self._pdf_template.render(**data)
         except Exception as e:
             logger.warning(f"Template rendering failed: {e}")
             # Return basic HTML
             return self._generate_basic_html(data)
     
-    def _html_to_pdf(self, html_content: str) -> bytes:
-        """Convert HTML to PDF using WeasyPrint."""
+    def _html_to_pdf(self, html_content: str, target: Path) -> None:
+        """Render HTML to a PDF file using WeasyPrint, or Chromium when configured."""
+        if PDF_BACKEND == "chromium" and CHROMIUM_AVAILABLE:
+            # A timed-out Chromium job keeps running on its thread; once we fall
+            # back it must not publish its (late) output over WeasyPrint's file
+            publish_lock = threading.Lock()
+            abandoned = threading.Event()
+            future = self._chromium_executor.submit(
+                self._html_to_pdf_chromium, html_content, target, publish_lock, abandoned
+            )
+            try:
+                future.result(timeout=PERFORMANCE["request_timeout"])
+                return
+            except Exception as e:
+                with publish_lock:
+                    abandoned.set()
+                future.cancel()
+                logger.warning(f"Chromium PDF rendering failed, using WeasyPrint: {e}")
+        
         try:
-            pdf_doc = weasyprint.HTML(string=html_content)
-            pdf_bytes = pdf_doc.write_pdf()
-            return pdf_bytes
+            # Stream into the file rather than building the whole PDF in memory first
+            with self._render_lock:
+                weasyprint.HTML(string=html_content, url_fetcher=_url_fetcher).write_pdf(
+                    target=str(target), font_config=self._font_config
+                )
         except Exception as e:
             logger.error(f"HTML to PDF conversion failed: {e}")
             raise
     
+    @classmethod
+    def _html_to_pdf_chromium(cls, html_content: str, target: Path,
+                              publish_lock: threading.Lock,
+                              abandoned: threading.Event) -> None:
+        """
+        Render HTML with a persistent headless Chromium (runs on the Chromium thread).
+        
+        The PDF is written to a temporary file and only moved onto `target` if
+        the caller is still waiting for it.
+        """
+        if cls._browser is None or not cls._browser.is_connected():
+            if cls._playwright is None:
+                from playwright.sync_api import sync_playwright
+                cls._playwright = sync_playwright().start()
+            cls._browser = cls._playwright.chromium.launch()
+            logger.info("Launched headless Chromium for PDF rendering")
+        
+        tmp_path = target.with_name(f".{target.name}.{threading.get_ident()}.tmp")
+        page = cls._browser.new_page()
+        try:
+            page.set_content(html_content, wait_until="load")
+            page.pdf(
+                path=str(tmp_path),
+                format=get_export_config("pdf").get("page_size", "A4"),
+                print_background=True
+            )
+            with publish_lock:
+                if abandoned.is_set():
+                    logger.info("Discarding late Chromium PDF; WeasyPrint fallback already ran")
+                else:
+                    os.replace(tmp_path, target)
+        finally:
+            page.close()
+            tmp_path.unlink(missing_ok=True)
+    
     def _get_pdf_template(self) -> str:
         """Get PDF template content."""
-        return """
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>{{ ticker }} Analysis Report</title>
-    <style>
-        body { 
-            font-family: Arial, sans-serif; 
-            margin: 40px; 
-            line-height: 1.6; 
-            color: #333;
-        }
-        .header { 
-            text-align: center; 
-            border-bottom: 3px solid #007acc; 
-            padding-bottom: 20px; 
-            margin-bottom: 30px; 
-        }
-        .company-name { 
-            font-size: 28px; 
-            font-weight: bold; 
-            color: #007acc; 
-            margin-bottom: 5px; 
-        }
-        .report-title { 
-            font-size: 18px; 
-            color: #666; 
-            margin-bottom: 10px; 
-        }
-        .metadata { 
-            font-size: 12px; 
-            color: #888; 
-        }
-        .section { 
-            margin-bottom: 25px; 
-            page-break-inside: avoid; 
-        }
-        .section-title { 
-            font-size: 18px; 
-            font-weight: bold; 
-            color: #007acc; 
-            border-bottom: 1px solid #ddd; 
-            padding-bottom: 5px; 
-            margin-bottom: 15px; 
-        }
-        .summary-box { 
-            background: #f8f9fa; 
-            border-left: 4px solid #007acc; 
-            padding: 15px; 
-            margin-bottom: 20px; 
-        }
-        .risk-item, .opportunity-item { 
-            background: #fff; 
-            border: 1px solid #e0e0e0; 
-            border-radius: 5px; 
-            padding: 12px; 
-            margin-bottom: 10px; 
-        }
-        .risk-item { 
-            border-left: 4px solid #dc3545; 
-        }
-        .opportunity-item { 
-            border-left: 4px solid #28a745; 
-        }
-        .item-title { 
-            font-weight: bold; 
-            margin-bottom: 5px; 
-        }
-        .item-rationale { 
-            color: #666; 
-            font-size: 14px; 
-        }
-        .metrics-grid { 
-            display: grid; 
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); 
-            gap: 15px; 
-            margin-top: 15px; 
-        }
-        .metric-card { 
-            background: #f8f9fa; 
-            border: 1px solid #e0e0e0; 
-            border-radius: 5px; 
-            padding: 15px; 
-            text-align: center; 
-        }
-        .metric-value { 
-            font-size: 24px; 
-            font-weight: bold; 
-            color: #007acc; 
-        }
-        .metric-label { 
-            font-size: 12px; 
-            color: #666; 
-            margin-top: 5px; 
-        }
-        .sources-table { 
-            width: 100%; 
-            border-collapse: collapse; 
-            margin-top: 15px; 
-        }
-        .sources-table th, .sources-table td { 
-            border: 1px solid #ddd; 
-            padding: 8px; 
-            text-align: left; 
-        }
-        .sources-table th { 
-            background-color: #f8f9fa; 
-            font-weight: bold; 
-        }
-        .chart-container { 
-            text-align: center; 
-            margin: 20px 0; 
-        }
-        .chart-image { 
-            max-width: 100%; 
-            height: auto; 
-        }
-    </style>
-</head>
-<body>
-    <div class="header">
-        <div class="company-name">{{ ticker }} Analysis Report</div>
-        <div class="report-title">AI-Powered Financial Analysis</div>
-        <div class="metadata">
-            Generated on {{ generated_at }} | Run ID: {{ run_id }}
-        </div>
-    </div>
-
-    <div class="section">
-        <div class="section-title">Executive Summary</div>
-        <div class="summary-box">
-            {{ tldr }}
-        </div>
-    </div>
-
-    <div class="section">
-        <div class="section-title">Key Risks</div>
-        {% for risk in risks %}
-        <div class="risk-item">
-            <div class="item-title">{{ risk.risk }}</div>
-            <div class="item-rationale">{{ risk.rationale }}</div>
-        </div>
-        {% endfor %}
-    </div>
-
-    <div class="section">
-        <div class="section-title">Key Opportunities</div>
-        {% for opportunity in opportunities %}
-        <div class="opportunity-item">
-            <div class="item-title">{{ opportunity.opportunity }}</div>
-            <div class="item-rationale">{{ opportunity.rationale }}</div>
-        </div>
-        {% endfor %}
-    </div>
-
-    <div class="section">
-        <div class="section-title">Key Metrics</div>
-        <div class="metrics-grid">
-            {% for metric in metrics %}
-            <div class="metric-card">
-                <div class="metric-value">{{ metric.value }}</div>
-                <div class="metric-label">{{ metric.metric }}</div>
-            </div>
-            {% endfor %}
-        </div>
-    </div>
-
-    {% if source_chart %}
-    <div class="section">
-        <div class="section-title">Data Sources</div>
-        <div class="chart-container">
-            <img src="data:image/png;base64,{{ source_chart }}" class="chart-image" alt="Source Distribution">
-        </div>
-        <table class="sources-table">
-            <thead>
-                <tr>
-                    <th>Source Type</th>
-                    <th>Count</th>
-                </tr>
-            </thead>
-            <tbody>
-                {% for source in source_breakdown %}
-                <tr>
-                    <td>{{ source.type }}</td>
-                    <td>{{ source.count }}</td>
-                </tr>
-                {% endfor %}
-            </tbody>
-        </table>
-    </div>
-    {% endif %}
-
-    <div class="section">
-        <div class="section-title">Analysis Details</div>
-        <p><strong>Total Sources Analyzed:</strong> {{ total_sources }}</p>
-        <p><strong>Analysis Method:</strong> AI-powered extraction using natural language processing</p>
-        <p><strong>Report Generated:</strong> {{ generated_at }}</p>
-    </div>
-</body>
-</html>
-        """
+        return _PDF_TEMPLATE_SRC
     
     def _generate_basic_html(self, data: Dict[str, Any]) -> str:
         """Generate basic HTML if template fails."""
@@ -4,24 +4,105 @@ Technical analysis module for generating financial charts and indicators.
 """
 
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+import time
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 import pandas as pd
 
 # Technical analysis imports
 try:
     import yfinance as yf
+    import plotly
     import plotly.graph_objects as go
     import plotly.express as px
     from plotly.subplots import make_subplots
+    from plotly.offline import get_plotlyjs_version
     import numpy as np
     CHARTS_AVAILABLE = True
+    # Plotly 6 serializes NumPy arrays as typed binary buffers instead of JSON lists
+    BINARY_ARRAYS = int(plotly.__version__.split('.')[0]) >= 6
 except ImportError:
     CHARTS_AVAILABLE = False
+    BINARY_ARRAYS = False
     logging.warning("Technical analysis dependencies not available")
 
 logger = logging.getLogger(__name__)
 
+HISTORY_TTL_SECONDS = 300
+DOWNSAMPLE_THRESHOLD = 500   # daily bars; longer series are plotted as weekly candles
+MONTHLY_THRESHOLD = 2000     # daily bars; beyond this, candles are monthly
+WEBGL_THRESHOLD = 1000       # points per indicator line
+OHLC_AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+_HIST_CACHE: Dict[Tuple[str, str], Tuple[float, pd.DataFrame]] = {}
+_HIST_LOCK = threading.Lock()
+
+
+def _history(ticker: str, period: str, ttl: float = HISTORY_TTL_SECONDS) -> pd.DataFrame:
+    """Fetch price history, reusing a recent download of the same ticker and period."""
+    key = (ticker.upper(), period)
+    with _HIST_LOCK:
+        cached = _HIST_CACHE.get(key)
+    if cached and time.time() - cached[0] < ttl:
+        return cached[1]
+    
+    hist_data = yf.Ticker(ticker).history(period=period)
+    if not hist_data.empty:
+        now = time.time()
+        with _HIST_LOCK:
+            # Drop expired downloads so the cache only holds recent tickers
+            for stale in [k for k, (fetched, _) in _HIST_CACHE.items() if now - fetched >= ttl]:
+                del _HIST_CACHE[stale]
+            _HIST_CACHE[key] = (now, hist_data)
+    return hist_data
+
+
+def _candle_bars(data: pd.DataFrame) -> pd.DataFrame:
+    """Daily OHLCV bars to draw as candles, aggregated to weeks or months when long."""
+    if len(data) <= DOWNSAMPLE_THRESHOLD:
+        return data
+    rule = 'ME' if len(data) > MONTHLY_THRESHOLD else 'W'
+    return data.resample(rule).agg(OHLC_AGGREGATION).dropna()
+
+
+def _plot_values(series: pd.Series):
+    """
+    Indicator values for a trace: float32 where Plotly embeds numeric arrays as
+    binary (Plotly 6+), halving their size in the chart HTML; the Series otherwise.
+    """
+    if BINARY_ARRAYS:
+        return series.to_numpy(dtype=np.float32)
+    return series
+
+
+def _rolling_windows(values: "np.ndarray", window: int) -> Optional["np.ndarray"]:
+    """Strided (n - window + 1, window) view over values, or None if too short."""
+    if len(values) < window:
+        return None
+    return np.lib.stride_tricks.sliding_window_view(values, window)
+
+
+def _rolling_mean(values: "np.ndarray", window: int) -> "np.ndarray":
+    """Trailing rolling mean, NaN until a full window is available (like pandas)."""
+    out = np.full(len(values), np.nan)
+    windows = _rolling_windows(values, window)
+    if windows is not None:
+        out[window - 1:] = windows.mean(axis=1)
+    return out
+
+
+def _rolling_mean_std(values: "np.ndarray", window: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Trailing rolling mean and sample std (ddof=1) from one pass over the windows."""
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    windows = _rolling_windows(values, window)
+    if windows is not None:
+        window_mean = windows.mean(axis=1)
+        deviations = windows - window_mean[:, None]
+        mean[window - 1:] = window_mean
+        std[window - 1:] = np.sqrt(np.einsum('ij,ij->i', deviations, deviations) / (window - 1))
+    return mean, std
+
 
 class TechnicalAnalyzer:
     """Technical analysis and chart generation."""
@@ -30,13 +111,15 @@ class TechnicalAnalyzer:
         """Initialize technical analyzer."""
         self.chart_theme = "plotly_white"
         
-    def generate_comprehensive_chart(self, ticker: str, period: str = "6mo") -> Optional[Dict[str, Any]]:
+    def generate_comprehensive_chart(self, ticker: str, period: str = "6mo",
+                                     bundle: bool = False) -> Optional[Dict[str, Any]]:
         """
         Generate a comprehensive technical analysis chart.
         
         Args:
             ticker: Stock ticker symbol
             period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
+            bundle: Return a bare chart div for render_charts_bundle instead of a page
             
         Returns:
             Dictionary with chart data and insights
@@ -47,8 +130,7 @@ class TechnicalAnalyzer:
         
         try:
             # Get stock data
-            stock = yf.Ticker(ticker)
-            hist_data = stock.history(period=period)
+            hist_data = _history(ticker, period)
             
             if hist_data.empty:
                 logger.warning(f"No historical data found for {ticker}")
@@ -58,7 +140,7 @@ class TechnicalAnalyzer:
             indicators = self._calculate_indicators(hist_data)
             
             # Create comprehensive chart
-            chart_html = self._create_multi_panel_chart(ticker, hist_data, indicators)
+            chart_html = self._create_multi_panel_chart(ticker, hist_data, indicators, bundle)
             
             # Generate insights
             insights = self._generate_technical_insights(ticker, hist_data, indicators)
@@ -80,18 +162,27 @@ class TechnicalAnalyzer:
         indicators = {}
         
         try:
-            # Moving Averages
-            indicators['sma_20'] = data['Close'].rolling(window=20).mean()
-            indicators['sma_50'] = data['Close'].rolling(window=50).mean()
+            # Work on contiguous float arrays; pandas is only used for the EMAs
+            close = data['Close'].to_numpy(dtype=np.float64)
+            volume = data['Volume'].to_numpy(dtype=np.float64)
+            
+            def series(values):
+                return pd.Series(values, index=data.index)
+            
+            # Moving Averages (the 20-day std for the Bollinger Bands shares the SMA's pass)
+            sma_20, std_20 = _rolling_mean_std(close, 20)
+            indicators['sma_20'] = series(sma_20)
+            indicators['sma_50'] = series(_rolling_mean(close, 50))
             indicators['ema_12'] = data['Close'].ewm(span=12).mean()
             indicators['ema_26'] = data['Close'].ewm(span=26).mean()
             
             # RSI (Relative Strength Index)
-            delta = data['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            indicators['rsi'] = 100 - (100 / (1 + rs))
+            delta = np.diff(close, prepend=np.nan)
+            gain = _rolling_mean(np.where(delta > 0, delta, 0.0), 14)
+            loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), 14)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rs = gain / loss
+            indicators['rsi'] = series(100 - (100 / (1 + rs)))
             
             # MACD
             indicators['macd'] = indicators['ema_12'] - indicators['ema_26']
@@ -99,13 +190,11 @@ class TechnicalAnalyzer:
             indicators['macd_histogram'] = indicators['macd'] - indicators['macd_signal']
             
             # Bollinger Bands
-            sma_20 = indicators['sma_20']
-            std_20 = data['Close'].rolling(window=20).std()
-            indicators['bb_upper'] = sma_20 + (std_20 * 2)
-            indicators['bb_lower'] = sma_20 - (std_20 * 2)
+            indicators['bb_upper'] = series(sma_20 + (std_20 * 2))
+            indicators['bb_lower'] = series(sma_20 - (std_20 * 2))
             
             # Volume indicators
-            indicators['volume_sma'] = data['Volume'].rolling(window=20).mean()
+            indicators['volume_sma'] = series(_rolling_mean(volume, 20))
             
         except Exception as e:
             logger.warning(f"Some indicators calculation failed: {e}")
@@ -113,9 +202,16 @@ class TechnicalAnalyzer:
         return indicators
     
     def _create_multi_panel_chart(self, ticker: str, data: pd.DataFrame, 
-                                indicators: Dict[str, pd.Series]) -> str:
+                                indicators: Dict[str, pd.Series], bundle: bool = False) -> str:
         """Create a multi-panel technical analysis chart."""
         
+        # Long histories are aggregated for the candle and volume bars only;
+        # indicators were computed on, and are plotted at, full resolution
+        bars = _candle_bars(data)
+        
+        # Indicator lines switch from SVG to WebGL once there are enough points
+        scatter = go.Scattergl if len(data) > WEBGL_THRESHOLD else go.Scatter
+        
         # Create subplots
         fig = make_subplots(
             rows=4, cols=1,
@@ -128,11 +224,11 @@ class TechnicalAnalyzer:
         # 1. Price Chart with Moving Averages and Bollinger Bands
         fig.add_trace(
             go.Candlestick(
-                x=data.index,
-                open=data['Open'],
-                high=data['High'],
-                low=data['Low'],
-                close=data['Close'],
+                x=bars.index,
+                open=bars['Open'],
+                high=bars['High'],
+                low=bars['Low'],
+                close=bars['Close'],
                 name='OHLC',
                 increasing_line_color='#26a69a',
                 decreasing_line_color='#ef5350'
@@ -143,53 +239,54 @@ class TechnicalAnalyzer:
         # Moving averages
         if 'sma_20' in indicators:
             fig.add_trace(
-                go.Scatter(x=data.index, y=indicators['sma_20'], 
-                          line=dict(color='orange', width=2), name='SMA 20'),
+                scatter(x=data.index, y=_plot_values(indicators['sma_20']), 
+                       line=dict(color='orange', width=2), name='SMA 20'),
                 row=1, col=1
             )
         
         if 'sma_50' in indicators:
             fig.add_trace(
-                go.Scatter(x=data.index, y=indicators['sma_50'], 
-                          line=dict(color='blue', width=2), name='SMA 50'),
+                scatter(x=data.index, y=_plot_values(indicators['sma_50']), 
+                       line=dict(color='blue', width=2), name='SMA 50'),
                 row=1, col=1
             )
         
         # Bollinger Bands
         if 'bb_upper' in indicators and 'bb_lower' in indicators:
             fig.add_trace(
-                go.Scatter(x=data.index, y=indicators['bb_upper'], 
-                          line=dict(color='gray', width=1, dash='dash'), name='BB Upper'),
+                scatter(x=data.index, y=_plot_values(indicators['bb_upper']), 
+                       line=dict(color='gray', width=1, dash='dash'), name='BB Upper'),
                 row=1, col=1
             )
             fig.add_trace(
-                go.Scatter(x=data.index, y=indicators['bb_lower'], 
-                          line=dict(color='gray', width=1, dash='dash'), name='BB Lower'),
+                scatter(x=data.index, y=_plot_values(indicators['bb_lower']), 
+                       line=dict(color='gray', width=1, dash='dash'), name='BB Lower'),
                 row=1, col=1
             )
         
         # 2. Volume Chart
-        colors = ['green' if row['Close'] >= row['Open'] else 'red' 
-                 for _, row in data.iterrows()]
+        colors = np.where(
+            bars['Close'].to_numpy() >= bars['Open'].to_numpy(), 'green', 'red'
+        ).tolist()
         
         fig.add_trace(
-            go.Bar(x=data.index, y=data['Volume'], name='Volume', 
+            go.Bar(x=bars.index, y=bars['Volume'], name='Volume', 
                    marker_color=colors, opacity=0.7),
             row=2, col=1
         )
         
         if 'volume_sma' in indicators:
             fig.add_trace(
-                go.Scatter(x=data.index, y=indicators['volume_sma'], 
-                          line=dict(color='purple', width=2), name='Volume SMA'),
+                scatter(x=data.index, y=_plot_values(indicators['volume_sma']), 
+                       line=dict(color='purple', width=2), name='Volume SMA'),
                 row=2, col=1
             )
         
         # 3. RSI Chart
         if 'rsi' in indicators:
             fig.add_trace(
-                go.Scatter(x=data.index, y=indicators['rsi'], 
-                          line=dict(color='orange', width=2), name='RSI'),
+                scatter(x=data.index, y=_plot_values(indicators['rsi']), 
+                       line=dict(color='orange', width=2), name='RSI'),
                 row=3, col=1
             )
             
@@ -202,22 +299,22 @@ class TechnicalAnalyzer:
         # 4. MACD Chart
         if 'macd' in indicators:
             fig.add_trace(
-                go.Scatter(x=data.index, y=indicators['macd'], 
-                          line=dict(color='blue', width=2), name='MACD'),
+                scatter(x=data.index, y=_plot_values(indicators['macd']), 
+                       line=dict(color='blue', width=2), name='MACD'),
                 row=4, col=1
             )
             
         if 'macd_signal' in indicators:
             fig.add_trace(
-                go.Scatter(x=data.index, y=indicators['macd_signal'], 
-                          line=dict(color='red', width=1), name='Signal'),
+                scatter(x=data.index, y=_plot_values(indicators['macd_signal']), 
+                       line=dict(color='red', width=1), name='Signal'),
                 row=4, col=1
             )
             
         if 'macd_histogram' in indicators:
-            colors = ['green' if val >= 0 else 'red' for val in indicators['macd_histogram']]
+            colors = np.where(indicators['macd_histogram'].to_numpy() >= 0, 'green', 'red').tolist()
             fig.add_trace(
-                go.Bar(x=data.index, y=indicators['macd_histogram'], 
+                go.Bar(x=data.index, y=_plot_values(indicators['macd_histogram']), 
                       name='MACD Histogram', marker_color=colors, opacity=0.6),
                 row=4, col=1
             )
@@ -238,7 +335,20 @@ class TechnicalAnalyzer:
         fig.update_yaxes(title_text="MACD", row=4, col=1)
         
         # Convert to HTML
-        return fig.to_html(include_plotlyjs='cdn', div_id="technical-chart")
+        return self._chart_html(fig, f"technical-chart-{ticker}", bundle)
+    
+    def _chart_html(self, fig, div_id: str, bundle: bool) -> str:
+        """Standalone chart page loading plotly.js from the CDN, or a bare div to bundle."""
+        if bundle:
+            return fig.to_html(include_plotlyjs=False, full_html=False, div_id=div_id)
+        return fig.to_html(include_plotlyjs='cdn', div_id=div_id)
+    
+    @staticmethod
+    def render_charts_bundle(chart_divs: List[str]) -> str:
+        """Compose chart divs made with bundle=True into one page that loads plotly.js once."""
+        script = (f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js" '
+                  f'charset="utf-8"></script>')
+        return script + "\n".join(chart_divs)
     
     def _generate_technical_insights(self, ticker: str, data: pd.DataFrame, 
                                    indicators: Dict[str, pd.Series]) -> List[Dict[str, str]]:
@@ -358,15 +468,15 @@ class TechnicalAnalyzer:
         
         return insights
 
-    def create_simple_price_chart(self, ticker: str, period: str = "3mo") -> Optional[str]:
-        """Create a simple price chart for quick viewing."""
+    def create_simple_price_chart(self, ticker: str, period: str = "3mo",
+                                  bundle: bool = False) -> Optional[str]:
+        """Create a simple price chart for quick viewing (a bare div when bundle=True)."""
         if not CHARTS_AVAILABLE:
             return None
         
         try:
             # Get stock data
-            stock = yf.Ticker(ticker)
-            hist_data = stock.history(period=period)
+            hist_data = _history(ticker, period)
             
             if hist_data.empty:
                 return None
@@ -389,7 +499,7 @@ class TechnicalAnalyzer:
                 template=self.chart_theme
             )
             
-            return fig.to_html(include_plotlyjs='cdn', div_id=f"price-chart-{ticker}")
+            return self._chart_html(fig, f"price-chart-{ticker}", bundle)
         
         except Exception as e:
             logger.error(f"Simple chart creation failed: {e}")
@@ -5,13 +5,30 @@ Watchlist management system for tracking multiple stocks.
 
 import json
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+import queue
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import sqlite3
 
 logger = logging.getLogger(__name__)
 
+READ_POOL_SIZE = 4  # idle read-only connections kept open
+ALERT_RETENTION_DAYS = 30  # acknowledged alerts older than this are pruned
+SQLITE_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"  # layout of CURRENT_TIMESTAMP
+# Before 3.46 PRAGMA optimize only considers tables this connection has queried,
+# and the dashboard's reads all go through the read-only pool
+OPTIMIZE_ALL_TABLES = sqlite3.sqlite_version_info >= (3, 46, 0)
+ANALYSIS_LIMIT = 400  # rows sampled per index, keeps statistics refreshes cheap
+
+
+def _utc_cutoff(hours: int) -> str:
+    """Return the UTC timestamp `hours` ago, formatted like CURRENT_TIMESTAMP."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+    return cutoff.strftime(SQLITE_TIMESTAMP_FORMAT)
+
 
 class WatchlistManager:
     """Manage stock watchlists and automated monitoring."""
@@ -20,12 +37,64 @@ class WatchlistManager:
         """Initialize watchlist manager."""
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=READ_POOL_SIZE)
         self._init_database()
     
+    def _open(self, readonly: bool = False) -> sqlite3.Connection:
+        """Open a long-lived connection with its PRAGMAs applied once."""
+        if readonly:
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -20000")
+        return conn
+    
+    @contextmanager
+    def _connect(self, readonly: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Yield a pooled connection.
+        
+        Writes share one connection under a lock and commit on success (rolling
+        back on error); reads borrow a read-only connection from a small pool.
+        """
+        if readonly and str(self.db_path) != ":memory:":
+            try:
+                conn = self._read_pool.get_nowait()
+            except queue.Empty:
+                conn = self._open(readonly=True)
+            try:
+                yield conn
+            finally:
+                try:
+                    self._read_pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+            return
+        
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self._open()
+            with self._write_conn:
+                yield self._write_conn
+    
     def _init_database(self):
         """Initialize watchlist database tables."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
+                # Only takes effect on a fresh file (before any table exists); lets
+                # prune_old_alerts hand freed pages back without a full VACUUM
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                # WAL is persistent, so it only needs to be set once per database file;
+                # readers then no longer block behind alert and timestamp writes
+                if str(self.db_path) != ":memory:":
+                    conn.execute("PRAGMA journal_mode = WAL")
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS watchlists (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -64,22 +133,58 @@ class WatchlistManager:
                     )
                 """)
                 
-                conn.commit()
+                # Keep watchlists.updated_at current from the schema itself, so
+                # item inserts and deletes don't need a second statement
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_watchlist_items_insert
+                    AFTER INSERT ON watchlist_items
+                    BEGIN
+                        UPDATE watchlists SET updated_at = CURRENT_TIMESTAMP
+                        WHERE id = NEW.watchlist_id;
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_watchlist_items_delete
+                    AFTER DELETE ON watchlist_items
+                    BEGIN
+                        UPDATE watchlists SET updated_at = CURRENT_TIMESTAMP
+                        WHERE id = OLD.watchlist_id;
+                    END
+                """)
+                
+                # watchlist_items(watchlist_id) lookups are already served by the
+                # UNIQUE(watchlist_id, ticker) autoindex
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_watchlist_items_last_analyzed
+                    ON watchlist_items (last_analyzed_at)
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_watchlist_alerts_item
+                    ON watchlist_alerts (watchlist_item_id, acknowledged)
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_watchlist_alerts_pending
+                    ON watchlist_alerts (triggered_at DESC)
+                    WHERE acknowledged = FALSE
+                """)
+                
                 logger.info("Watchlist database initialized")
                 
         except Exception as e:
             logger.error(f"Failed to initialize watchlist database: {e}")
+        
+        # SQLite's recommended call when opening a long-lived connection
+        self.optimize()
     
     def create_watchlist(self, name: str, description: str = "") -> int:
         """Create a new watchlist."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute(
                     "INSERT INTO watchlists (name, description) VALUES (?, ?)",
                     (name, description)
                 )
                 watchlist_id = cursor.lastrowid
-                conn.commit()
                 logger.info(f"Created watchlist '{name}' with ID {watchlist_id}")
                 return watchlist_id
         except sqlite3.IntegrityError:
@@ -92,13 +197,12 @@ class WatchlistManager:
     def get_watchlists(self) -> List[Dict[str, Any]]:
         """Get all watchlists."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect(readonly=True) as conn:
                 cursor = conn.execute("""
-                    SELECT w.*, COUNT(wi.id) as item_count
+                    SELECT w.*,
+                        (SELECT COUNT(*) FROM watchlist_items wi
+                         WHERE wi.watchlist_id = w.id) as item_count
                     FROM watchlists w
-                    LEFT JOIN watchlist_items wi ON w.id = wi.watchlist_id
-                    GROUP BY w.id
                     ORDER BY w.updated_at DESC
                 """)
                 return [dict(row) for row in cursor.fetchall()]
@@ -109,8 +213,7 @@ class WatchlistManager:
     def get_watchlist_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """Get watchlist by name."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect(readonly=True) as conn:
                 cursor = conn.execute(
                     "SELECT * FROM watchlists WHERE name = ?", (name,)
                 )
@@ -126,19 +229,12 @@ class WatchlistManager:
                         notes: str = "") -> bool:
         """Add ticker to watchlist."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute("""
                     INSERT INTO watchlist_items 
                     (watchlist_id, ticker, price_target_high, price_target_low, notes)
                     VALUES (?, ?, ?, ?, ?)
                 """, (watchlist_id, ticker.upper(), price_target_high, price_target_low, notes))
-                
-                # Update watchlist timestamp
-                conn.execute(
-                    "UPDATE watchlists SET updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                    (watchlist_id,)
-                )
-                conn.commit()
                 logger.info(f"Added {ticker} to watchlist {watchlist_id}")
                 return True
         except sqlite3.IntegrityError:
@@ -148,11 +244,36 @@ class WatchlistManager:
             logger.error(f"Failed to add ticker to watchlist: {e}")
             return False
     
+    def add_many_to_watchlist(self, watchlist_id: int, tickers: List[str]) -> int:
+        """
+        Add several tickers to a watchlist in a single transaction.
+        
+        Tickers already on the watchlist are skipped.
+        
+        Returns:
+            Number of tickers added
+        """
+        rows = [(watchlist_id, ticker.upper()) for ticker in tickers]
+        if not rows:
+            return 0
+        try:
+            with self._connect() as conn:
+                cursor = conn.executemany("""
+                    INSERT OR IGNORE INTO watchlist_items (watchlist_id, ticker)
+                    VALUES (?, ?)
+                """, rows)
+                # rowcount excludes the trigger's updates and skipped duplicates
+                added = cursor.rowcount
+                logger.info(f"Added {added} ticker(s) to watchlist {watchlist_id}")
+                return added
+        except Exception as e:
+            logger.error(f"Failed to add tickers to watchlist: {e}")
+            return 0
+    
     def get_watchlist_items(self, watchlist_id: int) -> List[Dict[str, Any]]:
         """Get all items in a watchlist."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect(readonly=True) as conn:
                 cursor = conn.execute("""
                     SELECT wi.*, COUNT(wa.id) as alert_count
                     FROM watchlist_items wi
@@ -170,19 +291,13 @@ class WatchlistManager:
     def remove_from_watchlist(self, watchlist_id: int, ticker: str) -> bool:
         """Remove ticker from watchlist."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute("""
                     DELETE FROM watchlist_items 
                     WHERE watchlist_id = ? AND ticker = ?
                 """, (watchlist_id, ticker.upper()))
                 
                 if cursor.rowcount > 0:
-                    # Update watchlist timestamp
-                    conn.execute(
-                        "UPDATE watchlists SET updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                        (watchlist_id,)
-                    )
-                    conn.commit()
                     logger.info(f"Removed {ticker} from watchlist {watchlist_id}")
                     return True
                 else:
@@ -194,37 +309,65 @@ class WatchlistManager:
     
     def update_last_analyzed(self, watchlist_id: int, ticker: str):
         """Update last analyzed timestamp for a ticker."""
+        self.update_last_analyzed_bulk(watchlist_id, [ticker])
+    
+    def update_last_analyzed_bulk(self, watchlist_id: int, tickers: List[str]) -> int:
+        """
+        Update last analyzed timestamp for several tickers in one statement.
+        
+        Returns:
+            Number of watchlist items updated
+        """
+        symbols = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        if not symbols:
+            return 0
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
+            with self._connect() as conn:
+                # Tickers travel as one JSON array so the SQL text is identical for
+                # any batch size and stays in the connection's statement cache
+                cursor = conn.execute("""
                     UPDATE watchlist_items 
                     SET last_analyzed_at = CURRENT_TIMESTAMP
-                    WHERE watchlist_id = ? AND ticker = ?
-                """, (watchlist_id, ticker.upper()))
-                conn.commit()
+                    WHERE watchlist_id = ? AND ticker IN (SELECT value FROM json_each(?))
+                """, (watchlist_id, json.dumps(symbols)))
+                return cursor.rowcount
         except Exception as e:
             logger.error(f"Failed to update last analyzed: {e}")
+            return 0
     
     def create_alert(self, watchlist_item_id: int, alert_type: str, message: str):
         """Create an alert for a watchlist item."""
+        self.create_alerts([(watchlist_item_id, alert_type, message)])
+    
+    def create_alerts(self, alerts: List[Tuple[int, str, str]]) -> int:
+        """
+        Create many alerts in a single transaction.
+        
+        Args:
+            alerts: (watchlist_item_id, alert_type, message) tuples
+            
+        Returns:
+            Number of alerts created
+        """
+        if not alerts:
+            return 0
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
+            with self._connect() as conn:
+                conn.executemany("""
                     INSERT INTO watchlist_alerts 
                     (watchlist_item_id, alert_type, message)
                     VALUES (?, ?, ?)
-                """, (watchlist_item_id, alert_type, message))
-                conn.commit()
-                logger.info(f"Created alert for item {watchlist_item_id}: {alert_type}")
+                """, alerts)
+                logger.info(f"Created {len(alerts)} alert(s)")
+                return len(alerts)
         except Exception as e:
-            logger.error(f"Failed to create alert: {e}")
+            logger.error(f"Failed to create alerts: {e}")
+            return 0
     
     def get_pending_alerts(self, watchlist_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get pending (unacknowledged) alerts."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
+            with self._connect(readonly=True) as conn:
                 if watchlist_id:
                     cursor = conn.execute("""
                         SELECT wa.*, wi.ticker, w.name as watchlist_name
@@ -252,22 +395,63 @@ class WatchlistManager:
     def acknowledge_alert(self, alert_id: int):
         """Acknowledge an alert."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute(
                     "UPDATE watchlist_alerts SET acknowledged = TRUE WHERE id = ?",
                     (alert_id,)
                 )
-                conn.commit()
         except Exception as e:
             logger.error(f"Failed to acknowledge alert: {e}")
     
+    def prune_old_alerts(self, days: int = ALERT_RETENTION_DAYS) -> int:
+        """
+        Delete acknowledged alerts older than `days` and reclaim their pages.
+        
+        Returns:
+            Number of alerts deleted
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute("""
+                    DELETE FROM watchlist_alerts
+                    WHERE acknowledged = TRUE AND triggered_at < datetime('now', ?)
+                """, (f"-{days} days",))
+                deleted = cursor.rowcount
+            if deleted:
+                with self._connect() as conn:
+                    # executescript steps the pragma to completion (execute() frees a
+                    # single page); a no-op unless the file uses auto_vacuum = INCREMENTAL
+                    conn.executescript("PRAGMA incremental_vacuum")
+                logger.info(f"Pruned {deleted} acknowledged alert(s) older than {days} days")
+            return deleted
+        except Exception as e:
+            logger.error(f"Failed to prune old alerts: {e}")
+            return 0
+    
+    def optimize(self):
+        """
+        Refresh the query planner's statistics.
+        
+        Runs on open and periodically on the long-lived write connection. With
+        SQLite 3.46+ only tables whose statistics have gone stale are analyzed;
+        older versions fall back to a sampled ANALYZE.
+        """
+        try:
+            with self._connect() as conn:
+                conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+                if OPTIMIZE_ALL_TABLES:
+                    conn.execute("PRAGMA optimize = 0x10002")
+                else:
+                    conn.execute("ANALYZE")
+        except Exception as e:
+            logger.error(f"Failed to optimize watchlist database: {e}")
+    
     def get_stale_items(self, hours: int = 24) -> List[Dict[str, Any]]:
         """Get watchlist items that haven't been analyzed recently."""
         try:
-            cutoff = datetime.now() - timedelta(hours=hours)
+            cutoff = _utc_cutoff(hours)
             
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect(readonly=True) as conn:
                 cursor = conn.execute("""
                     SELECT wi.*, w.name as watchlist_name
                     FROM watchlist_items wi
@@ -281,6 +465,22 @@ class WatchlistManager:
         except Exception as e:
             logger.error(f"Failed to get stale items: {e}")
             return []
+    
+    def count_stale_items(self, hours: int = 24, watchlist_id: Optional[int] = None) -> int:
+        """Count stale items without materializing their rows."""
+        try:
+            cutoff = _utc_cutoff(hours)
+            
+            with self._connect(readonly=True) as conn:
+                cursor = conn.execute("""
+                    SELECT COUNT(*) FROM watchlist_items
+                    WHERE (last_analyzed_at IS NULL OR last_analyzed_at < ?)
+                      AND (? IS NULL OR watchlist_id = ?)
+                """, (cutoff, watchlist_id, watchlist_id))
+                return cursor.fetchone()[0]
+        except Exception as e:
+            logger.error(f"Failed to count stale items: {e}")
+            return 0
 
 
 # Global instance
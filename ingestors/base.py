@@ -3,12 +3,14 @@ Base ingestor interface for data sources.
 """
 
 from abc import ABC, abstractmethod
+from collections import Counter
+from functools import partial
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import asyncio
 import logging
 
-from models.schemas import DataSource, SourceType
+from models.schemas import DataSource, SourceType, enum_value
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +20,8 @@ class BaseIngestor(ABC):
     def __init__(self, source_type: SourceType):
         """Initialize the ingestor."""
         self.source_type = source_type
+        self._source_type_str = enum_value(source_type)
+        self._make_source = partial(DataSource, type=source_type)
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
     
     @abstractmethod
@@ -67,19 +71,19 @@ class BaseIngestor(ABC):
             Exception: If all retries fail
         """
         last_exception = None
+        is_coroutine = asyncio.iscoroutinefunction(func)  # resolved once, not per attempt
         
         for attempt in range(max_retries):
             try:
-                if asyncio.iscoroutinefunction(func):
+                if is_coroutine:
                     return await func(*args, **kwargs)
-                else:
-                    return func(*args, **kwargs)
+                return func(*args, **kwargs)
             except Exception as e:
                 last_exception = e
                 self.logger.warning(f"Attempt {attempt + 1} failed: {e}")
                 
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(delay * (2 ** attempt))  # Exponential backoff
+                    await asyncio.sleep(delay * (1 << attempt))  # Exponential backoff
         
         self.logger.error(f"All {max_retries} attempts failed")
         raise last_exception
@@ -119,9 +123,8 @@ class BaseIngestor(ABC):
         Returns:
             DataSource object
         """
-        return DataSource(
+        return self._make_source(
             run_id=run_id,
-            type=self.source_type,
             url=url,
             title=title,
             published_at=published_at,
@@ -140,16 +143,11 @@ class BaseIngestor(ABC):
         """
         self.logger.info(
             f"Ingested {len(sources)} sources for query '{query}' "
-            f"from {self.source_type.value if hasattr(self.source_type, 'value') else self.source_type}"
+            f"from {self._source_type_str}"
         )
         
-        if sources:
-            source_types = {}
-            for source in sources:
-                source_type = source.type
-                source_types[source_type] = source_types.get(source_type, 0) + 1
-            
-            for source_type, count in source_types.items():
+        if sources and self.logger.isEnabledFor(logging.DEBUG):
+            for source_type, count in Counter(source.type for source in sources).items():
                 self.logger.debug(f"  - {source_type}: {count}")
     
     async def cleanup(self):
@@ -160,7 +158,7 @@ class BaseIngestor(ABC):
         pass
     
     def __str__(self):
-        return f"{self.__class__.__name__}({self.source_type.value if hasattr(self.source_type, 'value') else self.source_type})"
+        return f"{self.__class__.__name__}({self._source_type_str})"
     
     def __repr__(self):
         return self.__str__()
@@ -21,7 +21,7 @@ except ImportError:
 
 from .base import BaseIngestor
 from models.schemas import DataSource, SourceType
-from core.config import get_data_source_config
+from core.config import get_data_source_config, PERFORMANCE
 
 logger = logging.getLogger(__name__)
 
@@ -92,23 +92,24 @@ class NewsIngestor(BaseIngestor):
         self.logger.info(f"Starting news ingestion for query: {query}")
         
         try:
-            sources = []
-            
-            # Process RSS feeds
-            for feed_url in rss_feeds:
-                try:
-                    self.logger.info(f"Processing RSS feed: {feed_url}")
-                    feed_sources = await self._process_rss_feed(feed_url, query, max_articles // len(rss_feeds), run_id)
-                    self.logger.info(f"Feed {feed_url} returned {len(feed_sources)} sources")
-                    sources.extend(feed_sources)
-                    
-                    # Rate limiting between feeds
-                    if len(rss_feeds) > 1:
-                        await asyncio.sleep(0.5)
-                        
-                except Exception as e:
-                    self.logger.warning(f"Failed to process RSS feed {feed_url}: {e}")
-                    continue
+            # Feeds live on different hosts, so fetch them concurrently;
+            # the semaphore keeps us within the configured request budget.
+            semaphore = asyncio.Semaphore(PERFORMANCE["max_concurrent_requests"])
+            per_feed = max(1, max_articles // max(1, len(rss_feeds)))
+            
+            async def process_feed(feed_url: str) -> List[DataSource]:
+                async with semaphore:
+                    try:
+                        self.logger.info(f"Processing RSS feed: {feed_url}")
+                        feed_sources = await self._process_rss_feed(feed_url, query, per_feed, run_id)
+                        self.logger.info(f"Feed {feed_url} returned {len(feed_sources)} sources")
+                        return feed_sources
+                    except Exception as e:
+                        self.logger.warning(f"Failed to process RSS feed {feed_url}: {e}")
+                        return []
+            
+            results = await asyncio.gather(*(process_feed(url) for url in rss_feeds))
+            sources = [source for feed_sources in results for source in feed_sources]
             
             # Limit total sources
             sources = sources[:max_articles]
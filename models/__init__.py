@@ -5,6 +5,7 @@ Data models and database schema for the AI Research Analyst Agent.
 from .database import DatabaseManager
 from .schemas import (
     AnalysisRun, 
+    RunSummary,
     DataSource, 
     TextChunk, 
     Memo,
@@ -15,6 +16,7 @@ from .schemas import (
 __all__ = [
     "DatabaseManager",
     "AnalysisRun",
+    "RunSummary",
     "DataSource", 
     "TextChunk",
     "Memo",
@@ -5,13 +5,16 @@ SQLite database manager for the AI Research Analyst Agent.
 import sqlite3
 import json
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from pathlib import Path
 import logging
+import itertools
+import threading
+from contextlib import contextmanager
 
 from .schemas import (
     AnalysisRun, DataSource, TextChunk, Memo,
-    RunStatus, SourceType
+    RunStatus, SourceType, RunSummary, enum_value
 )
 from core.config import DATABASE_PATH
 
@@ -23,19 +26,76 @@ class DatabaseManager:
     def __init__(self, db_path: Optional[str] = None):
         """Initialize database manager."""
         self.db_path = db_path or str(DATABASE_PATH)
+        self._local = threading.local()
+        self._versions = itertools.count(1)
+        self.version = 0
         self._init_database()
     
     def _init_database(self):
         """Initialize database tables if they don't exist."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("PRAGMA foreign_keys = ON")
+            with self._connect() as conn:
+                # WAL is persistent, so it only needs to be set once per database file
+                conn.execute("PRAGMA journal_mode = WAL")
                 self._create_tables(conn)
                 logger.info(f"Database initialized at {self.db_path}")
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
             raise
     
+    def _thread_connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's long-lived connection, opening it on first use.
+        
+        PRAGMAs are applied once here, so the page cache and memory map
+        outlive a single method call.
+        """
+        conn = getattr(self._local, "db", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute("PRAGMA mmap_size = 268435456")
+            conn.execute("PRAGMA cache_size = -64000")
+            self._local.db = conn
+        return conn
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Yield this thread's connection.
+        
+        Commits on success and rolls back on error, bumping ``version`` after
+        any committed write. Inside transaction() the commit is left to it.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+        
+        conn = self._thread_connection()
+        changes = conn.total_changes
+        with conn:
+            yield conn
+        if conn.total_changes != changes:
+            # Committed writes invalidate reads cached against the old version
+            self.version = next(self._versions)
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group the writes made on this thread into a single commit."""
+        if getattr(self._local, "conn", None) is not None:
+            yield self._local.conn
+            return
+        
+        with self._connect() as conn:
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+    
     def _create_tables(self, conn: sqlite3.Connection):
         """Create database tables."""
         # Analysis runs table
@@ -99,6 +159,8 @@ class DatabaseManager:
         # Create indexes for better performance
         conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_query ON runs(query)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started_at DESC, id, query, status)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_query_status ON runs(query COLLATE NOCASE, status, finished_at DESC)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_sources_run_id ON sources(run_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_sources_type ON sources(type)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_source_id ON chunks(source_id)")
@@ -120,13 +182,12 @@ class DatabaseManager:
     def create_run(self, query: str) -> int:
         """Create a new analysis run and return its ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute("""
                     INSERT INTO runs (query, started_at, status)
                     VALUES (?, ?, ?)
                 """, (query, datetime.now(), RunStatus.PENDING.value))
                 run_id = cursor.lastrowid
-                conn.commit()
                 logger.info(f"Created analysis run {run_id} for query: {query}")
                 return run_id
         except Exception as e:
@@ -137,7 +198,7 @@ class DatabaseManager:
                          error_message: Optional[str] = None):
         """Update the status of an analysis run."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 if status == RunStatus.COMPLETED:
                     conn.execute("""
                         UPDATE runs 
@@ -150,43 +211,70 @@ class DatabaseManager:
                         SET status = ?, error_message = ?
                         WHERE id = ?
                     """, (status.value, error_message, run_id))
-                conn.commit()
                 logger.info(f"Updated run {run_id} status to {status.value}")
         except Exception as e:
             logger.error(f"Failed to update run status: {e}")
             raise
     
+    def update_run_metadata(self, run_id: int, metadata: Dict[str, Any]):
+        """Replace the metadata stored on an analysis run."""
+        try:
+            with self._connect() as conn:
+                conn.execute("UPDATE runs SET metadata = ? WHERE id = ?",
+                             (self._dict_to_json(metadata), run_id))
+        except Exception as e:
+            logger.error(f"Failed to update run metadata: {e}")
+            raise
+    
     def add_source(self, run_id: int, source_type: SourceType, url: Optional[str] = None,
                    title: Optional[str] = None, published_at: Optional[datetime] = None,
                    checksum: Optional[str] = None, raw_content: Optional[str] = None,
                    metadata: Optional[Dict[str, Any]] = None) -> int:
         """Add a data source and return its ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute("""
                     INSERT INTO sources (run_id, type, url, title, published_at, checksum, raw_content, metadata)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (run_id, source_type.value if hasattr(source_type, 'value') else source_type, url, title, published_at, checksum, 
+                """, (run_id, enum_value(source_type), url, title, published_at, checksum, 
                       raw_content, self._dict_to_json(metadata or {})))
                 source_id = cursor.lastrowid
-                conn.commit()
-                logger.info(f"Added source {source_id} of type {source_type.value if hasattr(source_type, 'value') else source_type} for run {run_id}")
+                logger.info(f"Added source {source_id} of type {enum_value(source_type)} for run {run_id}")
                 return source_id
         except Exception as e:
             logger.error(f"Failed to add source: {e}")
             raise
     
+    def add_sources_bulk(self, run_id: int, sources: List[DataSource]) -> int:
+        """Add many data sources in a single transaction and return the count."""
+        rows = [
+            (run_id, enum_value(source.type),
+             source.url, source.title, source.published_at, source.checksum,
+             source.raw_content, self._dict_to_json(source.metadata or {}))
+            for source in sources
+        ]
+        try:
+            with self._connect() as conn:
+                conn.executemany("""
+                    INSERT INTO sources (run_id, type, url, title, published_at, checksum, raw_content, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                logger.info(f"Added {len(rows)} sources for run {run_id}")
+                return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to add sources: {e}")
+            raise
+    
     def add_chunk(self, source_id: int, text: str, chunk_type: str,
                   metadata: Optional[Dict[str, Any]] = None) -> int:
         """Add a text chunk and return its ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute("""
                     INSERT INTO chunks (source_id, text, chunk_type, metadata, created_at)
                     VALUES (?, ?, ?, ?, ?)
                 """, (source_id, text, chunk_type, self._dict_to_json(metadata or {}), datetime.now()))
                 chunk_id = cursor.lastrowid
-                conn.commit()
                 return chunk_id
         except Exception as e:
             logger.error(f"Failed to add chunk: {e}")
@@ -197,7 +285,7 @@ class DatabaseManager:
                   html_content: str, metadata: Optional[Dict[str, Any]] = None) -> int:
         """Save a generated memo and return its ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute("""
                     INSERT INTO memos (run_id, tldr, risks_json, opportunities_json, metrics_json, html_content, created_at, metadata)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
@@ -205,7 +293,6 @@ class DatabaseManager:
                       json.dumps(metrics), html_content, datetime.now(), 
                       self._dict_to_json(metadata or {})))
                 memo_id = cursor.lastrowid
-                conn.commit()
                 logger.info(f"Saved memo {memo_id} for run {run_id}")
                 return memo_id
         except Exception as e:
@@ -215,7 +302,7 @@ class DatabaseManager:
     def get_run(self, run_id: int) -> Optional[AnalysisRun]:
         """Get an analysis run by ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute("""
                     SELECT id, query, started_at, finished_at, status, error_message, metadata
                     FROM runs WHERE id = ?
@@ -236,10 +323,36 @@ class DatabaseManager:
             logger.error(f"Failed to get run: {e}")
             return None
     
+    def get_latest_completed_run(self, query: str) -> Optional[AnalysisRun]:
+        """Get the most recently finished completed run for a query, ignoring case."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute("""
+                    SELECT id, query, started_at, finished_at, status, error_message, metadata
+                    FROM runs
+                    WHERE query = ? COLLATE NOCASE AND status = ?
+                    ORDER BY finished_at DESC LIMIT 1
+                """, (query, RunStatus.COMPLETED.value))
+                row = cursor.fetchone()
+                if row:
+                    return AnalysisRun(
+                        id=row[0],
+                        query=row[1],
+                        started_at=datetime.fromisoformat(row[2]),
+                        finished_at=datetime.fromisoformat(row[3]) if row[3] else None,
+                        status=RunStatus(row[4]),
+                        error_message=row[5],
+                        metadata=self._json_to_dict(row[6])
+                    )
+                return None
+        except Exception as e:
+            logger.error(f"Failed to get latest completed run: {e}")
+            return None
+    
     def get_sources(self, run_id: int) -> List[DataSource]:
         """Get all sources for a run."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute("""
                     SELECT id, run_id, type, url, title, published_at, checksum, raw_content, metadata
                     FROM sources WHERE run_id = ?
@@ -265,7 +378,7 @@ class DatabaseManager:
     def get_memo(self, run_id: int) -> Optional[Memo]:
         """Get the memo for a run."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute("""
                     SELECT id, run_id, tldr, risks_json, opportunities_json, metrics_json, html_content, created_at, metadata
                     FROM memos WHERE run_id = ?
@@ -291,7 +404,7 @@ class DatabaseManager:
     def get_recent_runs(self, limit: int = 10) -> List[AnalysisRun]:
         """Get recent analysis runs."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute("""
                     SELECT id, query, started_at, finished_at, status, error_message, metadata
                     FROM runs ORDER BY started_at DESC LIMIT ?
@@ -312,19 +425,34 @@ class DatabaseManager:
             logger.error(f"Failed to get recent runs: {e}")
             return []
     
+    def get_recent_run_summaries(self, limit: int = 10) -> List[RunSummary]:
+        """Get id, query, status and start time of recent runs."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute("""
+                    SELECT id, query, status, started_at
+                    FROM runs ORDER BY started_at DESC LIMIT ?
+                """, (limit,))
+                return [
+                    RunSummary(row[0], row[1], row[2], datetime.fromisoformat(row[3]))
+                    for row in cursor
+                ]
+        except Exception as e:
+            logger.error(f"Failed to get recent run summaries: {e}")
+            return []
+    
     def cleanup_old_runs(self, days_old: int = 30):
         """Clean up old analysis runs and related data."""
         try:
             cutoff_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
             cutoff_date = cutoff_date.replace(day=cutoff_date.day - days_old)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 # Delete old memos, chunks, sources, and runs
                 conn.execute("DELETE FROM memos WHERE created_at < ?", (cutoff_date,))
                 conn.execute("DELETE FROM chunks WHERE created_at < ?", (cutoff_date,))
                 conn.execute("DELETE FROM sources WHERE run_id IN (SELECT id FROM runs WHERE started_at < ?)", (cutoff_date,))
                 conn.execute("DELETE FROM runs WHERE started_at < ?", (cutoff_date,))
-                conn.commit()
                 
                 logger.info(f"Cleaned up runs older than {cutoff_date}")
         except Exception as e:
@@ -333,7 +461,7 @@ class DatabaseManager:
     def get_database_stats(self) -> Dict[str, Any]:
         """Get database statistics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 stats = {}
                 
                 # Count records in each table
@@ -2,11 +2,16 @@
 Pydantic schemas for data validation and structure.
 """
 
+from collections import namedtuple
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from enum import Enum
 from pydantic import BaseModel, Field, validator
 
+def enum_value(value: Any) -> Any:
+    """Return an Enum member's value, or the value itself if it is already plain."""
+    return value.value if isinstance(value, Enum) else value
+
 class RunStatus(str, Enum):
     """Status of an analysis run."""
     PENDING = "pending"
@@ -35,6 +40,9 @@ class AnalysisRun(BaseModel):
     class Config:
         use_enum_values = True
 
+# Lightweight row for listings that only need a run's headline fields
+RunSummary = namedtuple("RunSummary", ["id", "query", "status", "started_at"])
+
 class DataSource(BaseModel):
     """Represents a data source."""
     id: Optional[int] = None
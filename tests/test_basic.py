@@ -47,6 +47,112 @@ def test_schemas():
     except Exception as e:
         pytest.fail(f"Failed to create schema objects: {e}")
 
+def test_database_bulk_sources(tmp_path):
+    """Test that sources can be saved in bulk and read back"""
+    from models.database import DatabaseManager
+    from models.schemas import DataSource, SourceType
+    
+    database = DatabaseManager(str(tmp_path / "test.db"))
+    run_id = database.create_run("TEST")
+    sources = [
+        DataSource(run_id=run_id, type=SourceType.NEWS_ARTICLE, title=f"Article {i}",
+                   metadata={"rank": i})
+        for i in range(3)
+    ]
+    
+    assert database.add_sources_bulk(run_id, sources) == 3
+    saved = database.get_sources(run_id)
+    assert [s.title for s in saved] == ["Article 0", "Article 1", "Article 2"]
+    assert saved[2].metadata == {"rank": 2}
+    
+    summaries = database.get_recent_run_summaries(limit=5)
+    assert [(r.id, r.query, r.status) for r in summaries] == [(run_id, "TEST", "pending")]
+
+def test_database_transaction_rollback(tmp_path):
+    """Test that writes inside a failed transaction are rolled back"""
+    from models.database import DatabaseManager
+    from models.schemas import RunStatus
+    
+    database = DatabaseManager(str(tmp_path / "test.db"))
+    version = database.version
+    with pytest.raises(RuntimeError):
+        with database.transaction():
+            database.create_run("ROLLBACK")
+            raise RuntimeError("abort")
+    
+    with database.transaction():
+        run_id = database.create_run("COMMIT")
+    assert [r.id for r in database.get_recent_run_summaries()] == [run_id]
+    assert database.version > version
+    
+    database.update_run_status(run_id, RunStatus.COMPLETED)
+    assert database.get_latest_completed_run("commit").id == run_id
+    assert database.get_latest_completed_run("rollback") is None
+
+def test_watchlist_bulk_operations(tmp_path):
+    """Test bulk watchlist inserts and alert creation"""
+    from core.watchlist import WatchlistManager
+    
+    watchlist = WatchlistManager(str(tmp_path / "watchlist.db"))
+    watchlist_id = watchlist.create_watchlist("Tech")
+    
+    assert watchlist.add_many_to_watchlist(watchlist_id, ["AAPL", "MSFT", "NVDA"]) == 3
+    assert watchlist.add_many_to_watchlist(watchlist_id, ["AAPL", "GOOG"]) == 1
+    items = watchlist.get_watchlist_items(watchlist_id)
+    assert sorted(item["ticker"] for item in items) == ["AAPL", "GOOG", "MSFT", "NVDA"]
+    
+    alerts = [(item["id"], "price", f"{item['ticker']} moved") for item in items]
+    assert watchlist.create_alerts(alerts) == 4
+    assert len(watchlist.get_pending_alerts(watchlist_id)) == 4
+
+def test_ai_fallback_results_are_not_cached(tmp_path, monkeypatch):
+    """Test that fallbacks after a failed model call are never written to the disk cache"""
+    import threading
+    from core import ai_analyzer
+    
+    def failing_model(*args, **kwargs):
+        raise RuntimeError("model unavailable")
+    
+    class FailingSummarizer:
+        tokenizer = staticmethod(failing_model)
+    
+    monkeypatch.setattr(ai_analyzer, "AI_CACHE_DIR", tmp_path / "ai")
+    analyzer = ai_analyzer.AIAnalyzer.__new__(ai_analyzer.AIAnalyzer)
+    analyzer.summarizer = FailingSummarizer()
+    analyzer.classifier = failing_model
+    analyzer._classification_cache = {}
+    analyzer._classification_lock = threading.Lock()
+    
+    chunks = ["Revenue growth faces significant risk from intense competition and regulatory pressure. " * 3]
+    assert analyzer.generate_summary(chunks) == analyzer._generate_summary_fallback(chunks)
+    assert len(analyzer.extract_risks(chunks)) == 3
+    assert not (tmp_path / "ai").exists() or not any((tmp_path / "ai").iterdir())
+
+def test_long_history_candles_are_downsampled():
+    """Test that long daily histories are plotted with fewer, aggregated candles"""
+    import numpy as np
+    import pandas as pd
+    from core.technical_analysis import _candle_bars
+    
+    index = pd.bdate_range("2022-01-03", periods=600)
+    close = np.linspace(100, 160, len(index))
+    data = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1,
+                         "Close": close, "Volume": 1000}, index=index)
+    
+    bars = _candle_bars(data)
+    assert len(bars) < len(data)
+    assert bars["Volume"].sum() == data["Volume"].sum()
+    assert len(_candle_bars(data.iloc[:250])) == 250
+
+def test_source_excerpt_skips_leading_whitespace():
+    """Test that memo excerpts keep a source's text after long leading whitespace"""
+    from app import _source_excerpt
+    
+    text = "Item 1A. Risk Factors. " * 10
+    assert _source_excerpt(" \n" * 200 + text) == text.strip()
+    assert _source_excerpt("\t" * 80 + "x" * 2000) == "x" * 1000 + "..."
+    assert _source_excerpt("   too short   ") is None
+
 if __name__ == "__main__":
     pytest.main([__file__])
 